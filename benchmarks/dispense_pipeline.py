@@ -0,0 +1,28 @@
+"""Run with: python -m benchmarks.dispense_pipeline"""
+
+import time
+
+from testing_training.machine.buyer_app.engines_controller import EnginesController
+
+
+def main() -> None:
+    plan = [(1, 1), (1, 2), (2, 1), (2, 2), (3, 1), (3, 2)]
+    engines_controller = EnginesController()
+    engines_controller.open()
+
+    start = time.perf_counter()
+    for row, column in plan:
+        engines_controller.move_engine(row, column)
+    one_by_one = time.perf_counter() - start
+
+    start = time.perf_counter()
+    engines_controller.move_engines(plan)
+    pipelined = time.perf_counter() - start
+
+    engines_controller.close()
+    print(f"{len(plan)} engines one by one: {one_by_one:.3f}s")
+    print(f"{len(plan)} engines pipelined:  {pipelined:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Run with: python -m benchmarks.engine_lookup"""
+
+import random
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+
+from sqlalchemy import select, text
+
+from testing_training.machine.config import MachineSettings
+from testing_training.machine.database import Session, create_machine_engine, migrate
+from testing_training.machine.inventory import (
+    EngineStock,
+    get_engine_with_product,
+    set_stock_on_engines,
+)
+from testing_training.machine.inventory.engine import Engine
+from testing_training.machine.inventory.stock import Stock
+from testing_training.machine.products.money import Currency, Money
+from testing_training.machine.products.product import Product
+
+ROWS = 100
+COLUMNS = 50
+PRODUCTS = 1000
+LOOKUPS = 2000
+
+
+def two_step_lookup(product_id: int) -> tuple[int, int]:
+    session = Session()
+    stmt = select(Stock).filter(Stock.product_id == product_id, Stock.quantity > 0)
+    stock = session.execute(stmt).scalars().first()
+    engine = (
+        session.execute(select(Engine).filter(Engine.stock_id == stock.id))
+        .scalars()
+        .first()
+    )
+    return engine.row, engine.column
+
+
+def timed(lookup: Callable[[int], object], product_ids: list[int]) -> float:
+    start = time.perf_counter()
+    for product_id in product_ids:
+        lookup(product_id)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as directory:
+        engine = create_machine_engine(
+            MachineSettings(DB_ENGINE_URL=f"sqlite:///{Path(directory) / 'bench.db'}")
+        )
+        migrate(engine)
+        Session.configure(bind=engine)
+        session = Session()
+        products = [
+            Product(
+                name=f"Product {i}",
+                description="Irrelevant",
+                price=Money(1, Currency.PLN),
+                image=b"image",
+            )
+            for i in range(PRODUCTS)
+        ]
+        session.add_all(products)
+        session.flush()
+        set_stock_on_engines(
+            EngineStock(
+                row=row,
+                column=column,
+                product_id=products[(row * COLUMNS + column) % PRODUCTS].id,
+                quantity=random.randint(0, 5),
+            )
+            for row in range(1, ROWS + 1)
+            for column in range(1, COLUMNS + 1)
+        )
+        session.commit()
+        product_ids = [
+            product_id
+            for (product_id,) in session.execute(
+                select(Stock.product_id).filter(Stock.quantity > 0).distinct()
+            )
+        ]
+        lookups = random.choices(product_ids, k=LOOKUPS)
+
+        indexed = timed(get_engine_with_product, lookups)
+        session.execute(text("DROP INDEX ix_stocks_product_id_quantity"))
+        session.execute(text("DROP INDEX ix_engines_stock_id"))
+        session.commit()
+        unindexed = timed(get_engine_with_product, lookups)
+        two_step = timed(two_step_lookup, lookups)
+
+        Session.remove()
+        engine.dispose()
+
+    print(f"{LOOKUPS} lookups over {ROWS * COLUMNS} engines")
+    print(f"two queries, no indexes:  {two_step:.3f}s")
+    print(f"joined query, no indexes: {unindexed:.3f}s")
+    print(f"joined query, indexed:    {indexed:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
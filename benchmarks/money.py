@@ -0,0 +1,112 @@
+"""Run with: python -m benchmarks.money"""
+
+import timeit
+from decimal import Decimal
+
+from testing_training.machine.products.money import Currency, Money, MoneyArray
+
+
+class DecimalMoney:
+    """Previous Decimal-backed implementation, kept here as the baseline."""
+
+    def __init__(self, amount: Decimal | int | float, currency: Currency | str) -> None:
+        self.currency = Currency(currency)
+        if isinstance(amount, float):
+            amount = Decimal(str(amount))
+        else:
+            amount = Decimal(amount)
+        amount = amount.normalize()
+        decimal_tuple = amount.as_tuple()
+        if decimal_tuple.sign:
+            raise ValueError("Amount has to be positive")
+        elif -decimal_tuple.exponent > 2:
+            raise ValueError("Amount has to have at most two decimal places")
+        self.amount = amount
+
+    def __mul__(self, other: int) -> "DecimalMoney":
+        return type(self)(self.amount * other, self.currency)
+
+    def __add__(self, other: object) -> "DecimalMoney":
+        match other:
+            case DecimalMoney(amount=amount, currency=self.currency):
+                return type(self)(self.amount + amount, self.currency)
+            case 0:
+                return self
+            case _:
+                raise TypeError
+
+    def __radd__(self, other: object) -> "DecimalMoney":
+        return self.__add__(other)
+
+
+NUMBER = 100_000
+ORDER_LINES = 20
+REPORT_LINES = 5000
+
+
+def main() -> None:
+    cases = {
+        "construct from Decimal": (
+            lambda: DecimalMoney(Decimal("5.49"), Currency.PLN),
+            lambda: Money(Decimal("5.49"), Currency.PLN),
+        ),
+        "construct from int": (
+            lambda: DecimalMoney(5, Currency.PLN),
+            lambda: Money(5, Currency.PLN),
+        ),
+        "construct trusted": (
+            lambda: DecimalMoney(Decimal("5.49"), Currency.PLN),
+            lambda: Money.from_minor_units(549, Currency.PLN),
+        ),
+    }
+    old_price = DecimalMoney(Decimal("5.49"), Currency.PLN)
+    new_price = Money(Decimal("5.49"), Currency.PLN)
+    cases["add"] = (lambda: old_price + old_price, lambda: new_price + new_price)
+    cases[f"order total of {ORDER_LINES} lines"] = (
+        lambda: sum(old_price * 2 for _ in range(ORDER_LINES)),
+        lambda: sum(new_price * 2 for _ in range(ORDER_LINES)),
+    )
+
+    for name, (old, new) in cases.items():
+        number = NUMBER // ORDER_LINES if "order" in name else NUMBER
+        old_time = timeit.timeit(old, number=number)
+        new_time = timeit.timeit(new, number=number)
+        print(
+            f"{name:>26}: {old_time / number * 1e6:6.2f}us -> "
+            f"{new_time / number * 1e6:6.2f}us ({old_time / new_time:.1f}x)"
+        )
+
+    prices = [
+        Money.from_minor_units(100 + i % 900, Currency.PLN) for i in range(REPORT_LINES)
+    ]
+    quantities = [1 + i % 5 for i in range(REPORT_LINES)]
+    batched = {
+        "total": (
+            lambda: sum(
+                price * quantity for price, quantity in zip(prices, quantities)
+            ),
+            lambda: Money.sum_products(prices, quantities),
+        ),
+        "commission split": (
+            lambda: [
+                Money.from_minor_units(
+                    round(price.minor_units * quantity * Decimal("0.2")), Currency.PLN
+                )
+                for price, quantity in zip(prices, quantities)
+            ],
+            lambda: MoneyArray.from_money(prices, quantities).split_commission(
+                Decimal("0.2")
+            ),
+        ),
+    }
+    for name, (per_line, vectorized) in batched.items():
+        per_line_time = timeit.timeit(per_line, number=20) / 20
+        vectorized_time = timeit.timeit(vectorized, number=20) / 20
+        print(
+            f"{REPORT_LINES} lines {name:>16}: {per_line_time * 1e3:6.2f}ms -> "
+            f"{vectorized_time * 1e3:6.2f}ms ({per_line_time / vectorized_time:.1f}x)"
+        )
+
+
+if __name__ == "__main__":
+    main()
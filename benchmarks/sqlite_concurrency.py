@@ -0,0 +1,103 @@
+"""Run with: python -m benchmarks.sqlite_concurrency"""
+
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from sqlalchemy import Engine, text
+from sqlalchemy.exc import OperationalError
+
+from testing_training.machine.config import MachineSettings
+from testing_training.machine.database import create_machine_engine
+
+WRITERS = 4
+READERS = 4
+WRITES_PER_WRITER = 200
+BUSY_TIMEOUT_MS = 100
+
+
+def run(engine: Engine) -> tuple[float, int, float]:
+    with engine.begin() as connection:
+        connection.execute(
+            text("CREATE TABLE stocks (id INTEGER PRIMARY KEY, quantity INTEGER)")
+        )
+        connection.execute(
+            text("INSERT INTO stocks (id, quantity) VALUES (:id, 1000000)"),
+            [{"id": stock_id} for stock_id in range(WRITERS)],
+        )
+
+    locked = 0
+    slowest_read = 0.0
+    lock = threading.Lock()
+    writing = threading.Event()
+    writing.set()
+
+    def write(stock_id: int) -> None:
+        nonlocal locked
+        for _ in range(WRITES_PER_WRITER):
+            try:
+                with engine.begin() as connection:
+                    connection.execute(
+                        text(
+                            "UPDATE stocks SET quantity = quantity - 1 WHERE id = :id"
+                        ),
+                        {"id": stock_id},
+                    )
+            except OperationalError:
+                with lock:
+                    locked += 1
+
+    def read() -> None:
+        nonlocal locked, slowest_read
+        while writing.is_set():
+            start = time.perf_counter()
+            try:
+                with engine.connect() as connection:
+                    connection.execute(text("SELECT sum(quantity) FROM stocks"))
+            except OperationalError:
+                with lock:
+                    locked += 1
+            with lock:
+                slowest_read = max(slowest_read, time.perf_counter() - start)
+
+    readers = [threading.Thread(target=read) for _ in range(READERS)]
+    writers = [threading.Thread(target=write, args=(i,)) for i in range(WRITERS)]
+    start = time.perf_counter()
+    for thread in readers + writers:
+        thread.start()
+    for thread in writers:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    writing.clear()
+    for thread in readers:
+        thread.join()
+    engine.dispose()
+    return elapsed, locked, slowest_read
+
+
+def main() -> None:
+    configurations = {
+        "rollback journal": {
+            "SQLITE_JOURNAL_MODE": "DELETE",
+            "SQLITE_SYNCHRONOUS": "FULL",
+        },
+        "WAL": {},
+    }
+    for name, overrides in configurations.items():
+        with tempfile.TemporaryDirectory() as directory:
+            settings = MachineSettings(
+                DB_ENGINE_URL=f"sqlite:///{Path(directory) / 'bench.db'}",
+                SQLITE_BUSY_TIMEOUT_MS=BUSY_TIMEOUT_MS,
+                **overrides,
+            )
+            elapsed, locked, slowest_read = run(create_machine_engine(settings))
+        print(
+            f"{name:>16}: {WRITERS * WRITES_PER_WRITER} writes in {elapsed:.3f}s, "
+            f"{locked} 'database is locked' errors, "
+            f"slowest read {slowest_read * 1000:.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
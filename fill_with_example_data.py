@@ -2,17 +2,21 @@ from pathlib import Path
 
 from sqlalchemy import select
 
-from testing_training.machine.inventory.engine import Engine
-from testing_training.machine.inventory.stock import Stock
+from testing_training.machine.inventory import EngineStock, set_stock_on_engines
 from testing_training.machine.products.money import Money, Currency
 from testing_training.machine.buyer_app.order import Order
-from testing_training.machine.products import add_product, list_products
-from testing_training.machine.database import Base, Session, engine as db_engine
+from testing_training.machine.products import add_product, catalog
+from testing_training.machine.database import (
+    Base,
+    Session,
+    engine as db_engine,
+    migrate,
+)
 
 
 def main() -> None:
     Base.metadata.drop_all(bind=db_engine)
-    Base.metadata.create_all(bind=db_engine)
+    migrate(db_engine)
 
     images_dir = Path(__file__).parent / "example_data"
 
@@ -43,52 +47,24 @@ def main() -> None:
             (images_dir / "peanuts.webp").read_bytes(),
         )
 
-        products = list_products()
+        product_by_name = catalog.by_name()
+        water = product_by_name["Pure Still Water"]
+        isotonic = product_by_name["nErgize Isotonic Drink"]
+        protein_bar = product_by_name["Pow3r Protein Bar"]
+        peanuts = product_by_name["Crunchy Peantus"]
 
-        water = next(
-            product for product in products if product.name == "Pure Still Water"
+        engines = (
+            [(1, column, water, 4) for column in [1, 2, 3, 4]]
+            + [(row, column, isotonic, 4) for row in [2, 3] for column in [1, 2, 3, 4]]
+            + [(4, column, protein_bar, 0) for column in [1, 2]]
+            + [(4, column, peanuts, 4) for column in [3, 4]]
         )
-        isotonic = next(
-            product for product in products if product.name == "nErgize Isotonic Drink"
+        set_stock_on_engines(
+            EngineStock(
+                row=row, column=column, product_id=product.id, quantity=quantity
+            )
+            for row, column, product, quantity in engines
         )
-        protein_bar = next(
-            product for product in products if product.name == "Pow3r Protein Bar"
-        )
-        peanuts = next(
-            product for product in products if product.name == "Crunchy Peantus"
-        )
-
-        for row, column in zip([1] * 4, [1, 2, 3, 4]):
-            stock = Stock(product_id=water.id, quantity=4)
-            session.add(stock)
-            session.flush()
-            engine = Engine(row=row, column=column, stock_id=stock.id)
-            session.add(engine)
-            session.flush()
-
-        for row, column in zip([2] * 4 + [3] * 4, [1, 2, 3, 4] * 2):
-            stock = Stock(product_id=isotonic.id, quantity=4)
-            session.add(stock)
-            session.flush()
-            engine = Engine(row=row, column=column, stock_id=stock.id)
-            session.add(engine)
-            session.flush()
-
-        for row, column in zip([4] * 2, [1, 2]):
-            stock = Stock(product_id=protein_bar.id, quantity=0)
-            session.add(stock)
-            session.flush()
-            engine = Engine(row=row, column=column, stock_id=stock.id)
-            session.add(engine)
-            session.flush()
-
-        for row, column in zip([4] * 2, [3, 4]):
-            stock = Stock(product_id=peanuts.id, quantity=4)
-            session.add(stock)
-            session.flush()
-            engine = Engine(row=row, column=column, stock_id=stock.id)
-            session.add(engine)
-            session.flush()
 
         session.commit()
 
@@ -0,0 +1,52 @@
+import asyncio
+import threading
+from typing import Generic, Self, TypeVar
+
+T = TypeVar("T")
+
+
+class Subscription(Generic[T]):
+    def __init__(self, bus: "Bus[T]", loop: asyncio.AbstractEventLoop) -> None:
+        self._bus = bus
+        self._loop = loop
+        self._queue: asyncio.Queue[T] = asyncio.Queue()
+
+    async def get(self) -> T:
+        return await self._queue.get()
+
+    def close(self) -> None:
+        self._bus.unsubscribe(self)
+
+    def _deliver(self, message: T) -> None:
+        self._loop.call_soon_threadsafe(self._queue.put_nowait, message)
+
+    def __enter__(self) -> Self:
+        return self
+
+    def __exit__(self, *args: object) -> None:
+        self.close()
+
+
+class Bus(Generic[T]):
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._subscriptions: set[Subscription[T]] = set()
+
+    def subscribe(self) -> Subscription[T]:
+        subscription = Subscription(self, asyncio.get_running_loop())
+        with self._lock:
+            self._subscriptions.add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription[T]) -> None:
+        with self._lock:
+            self._subscriptions.discard(subscription)
+
+    def publish(self, message: T) -> None:
+        with self._lock:
+            subscriptions = list(self._subscriptions)
+        for subscription in subscriptions:
+            try:
+                subscription._deliver(message)
+            except RuntimeError:
+                self.unsubscribe(subscription)
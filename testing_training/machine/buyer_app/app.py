@@ -1,20 +1,62 @@
-import base64
+import asyncio
+import json
+import uuid
+from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Annotated, AsyncIterator
 
-from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, Header, Request
+from fastapi.responses import (
+    HTMLResponse,
+    JSONResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 from pydantic import BaseModel
 
-from testing_training.machine.buyer_app.order import Order
+from testing_training.machine.buyer_app.dispense_queue import dispense_worker
+from testing_training.machine.buyer_app.idempotency import (
+    IdempotencyKeyReused,
+    placed_orders,
+    request_hash,
+)
+from testing_training.machine.buyer_app.order import FINAL_STATUSES, Order
+from testing_training.machine.buyer_app.order_archive import ArchivedOrder
+from testing_training.machine.buyer_app.order_events import (
+    OrderStatusChanged,
+    order_events,
+)
+from testing_training.machine.buyer_app.scheduler import scheduler
 from testing_training.machine.buyer_app.vending import Vending
-from testing_training.machine.database import Session
-from testing_training.machine.inventory import get_inventory
-from testing_training.machine.products import list_products
+from testing_training.machine.bus import Subscription
+from testing_training.machine.database import Session, migrate
+from testing_training.machine.inventory import (
+    get_inventory,
+    inventory_feed,
+    InventoryChanged,
+    NotEnoughStock,
+    refresh_inventory_feed,
+)
+from testing_training.machine.products import catalog, get_product
 
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    migrate(Session.get_bind())
+    scheduler.start()
+    dispense_worker.start()
+    yield
+    scheduler.stop()
+    dispense_worker.stop()
+
+
+app = FastAPI(lifespan=lifespan)
+
+BOOT_ID = uuid.uuid4().hex[:12]
+INVENTORY_REFRESH_INTERVAL = 1.0
+KEEP_ALIVE_INTERVAL = 15.0
 
 STATIC_FILES_DIR = Path(__file__).parent / "static"
 app.mount("/static", StaticFiles(directory=STATIC_FILES_DIR), name="static")
@@ -33,8 +75,17 @@ async def index(request: Request) -> HTMLResponse:
 
 
 @app.get("/products")
-def products() -> list[dict]:
-    all_products = list_products()
+async def products(request: Request) -> Response:
+    etag = _version_etag(catalog.version)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=_revalidate_headers(etag))
+    return JSONResponse(
+        content=await asyncio.to_thread(_products),
+        headers=_revalidate_headers(etag),
+    )
+
+
+def _products() -> list[dict]:
     return [
         {
             "id": product.id,
@@ -44,29 +95,132 @@ def products() -> list[dict]:
                 "amount": f"{product.price.amount:.2f}",
                 "currency": product.price.currency.name,
             },
-            "image": base64.b64encode(product.image),
+            "image_url": f"/products/{product.id}/image?v={product.image_hash}",
+            "image_hash": product.image_hash,
         }
-        for product in all_products
+        for product in catalog.products()
     ]
 
 
+@app.get("/products/{product_id}/image")
+def product_image(product_id: int, request: Request) -> Response:
+    product = get_product(product_id)
+    if product is None:
+        return JSONResponse(content={"error": "Product not found"}, status_code=404)
+
+    etag = f'"{product.image_hash}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=86400"}
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=product.image, media_type="image/webp", headers=headers)
+
+
 @app.get("/inventory")
-def inventory() -> dict[int, int]:
+async def inventory(request: Request) -> Response:
+    await asyncio.to_thread(refresh_inventory_feed)
+    etag = _version_etag(inventory_feed.version)
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=_revalidate_headers(etag))
+    return JSONResponse(
+        content=await asyncio.to_thread(_inventory),
+        headers=_revalidate_headers(etag),
+    )
+
+
+def _inventory() -> dict[int, int]:
     entries = get_inventory()
     return {entry.product_id: entry.quantity for entry in entries}
 
 
+@app.get("/inventory/stream")
+async def inventory_stream(
+    since: int | None = None,
+    last_event_id: Annotated[int | None, Header()] = None,
+) -> StreamingResponse:
+    subscription = inventory_feed.bus.subscribe()
+    await asyncio.to_thread(refresh_inventory_feed)
+    if since is None:
+        since = last_event_id
+    changes = inventory_feed.changes_since(since) if since is not None else None
+    if changes is None:
+        version = inventory_feed.version
+        snapshot = await asyncio.to_thread(_inventory)
+        first = [_sse_event("snapshot", version, {"inventory": snapshot})]
+    else:
+        version = changes[-1].version if changes else since
+        first = [_inventory_change_event(change) for change in changes]
+    return StreamingResponse(
+        _inventory_stream(subscription, first, version),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+async def _inventory_stream(
+    subscription: Subscription[InventoryChanged], first: list[str], version: int
+) -> AsyncIterator[str]:
+    with subscription:
+        for event in first:
+            yield event
+        idle = 0.0
+        while True:
+            try:
+                change = await asyncio.wait_for(
+                    subscription.get(), timeout=INVENTORY_REFRESH_INTERVAL
+                )
+            except asyncio.TimeoutError:
+                await asyncio.to_thread(refresh_inventory_feed)
+                idle += INVENTORY_REFRESH_INTERVAL
+                if idle >= KEEP_ALIVE_INTERVAL:
+                    idle = 0.0
+                    yield ": keep-alive\n\n"
+                continue
+            idle = 0.0
+            if change.version <= version:
+                continue
+            version = change.version
+            yield _inventory_change_event(change)
+
+
+def _inventory_change_event(change: InventoryChanged) -> str:
+    return _sse_event("change", change.version, {"changes": dict(change.quantities)})
+
+
+def _sse_event(name: str, version: int, data: dict) -> str:
+    payload = json.dumps({"version": version, **data})
+    return f"id: {version}\nevent: {name}\ndata: {payload}\n\n"
+
+
 class OrderPayload(BaseModel):
     items: dict[int, int]
+    idempotency_key: str | None = None
 
 
 @app.post("/order")
 def order(payload: OrderPayload) -> JSONResponse:
+    key = payload.idempotency_key
+    items_hash = request_hash(payload.items)
     session = Session()
     vending = Vending(session=session)
-    order = vending.place_order(payload.items)
+    try:
+        if key is not None:
+            response = placed_orders.get(key, items_hash)
+            if response is not None:
+                return JSONResponse(content=response)
+        order = vending.place_order(payload.items, idempotency_key=key)
+    except IdempotencyKeyReused:
+        session.rollback()
+        return JSONResponse(
+            content={"error": "Idempotency key was used for a different order"},
+            status_code=422,
+        )
+    except NotEnoughStock:
+        session.rollback()
+        return JSONResponse(content={"error": "Not enough stock"}, status_code=409)
     response = _order_to_dict(order)
     session.commit()
+    if key is not None:
+        placed_orders.put(key, items_hash, response)
     return JSONResponse(content=response)
 
 
@@ -81,12 +235,73 @@ def get_order(order_id: str) -> JSONResponse:
     return JSONResponse(content=response)
 
 
+@app.get("/order/{order_id}/events")
+async def order_status_events(order_id: int) -> Response:
+    subscription = order_events.subscribe()
+    order = await asyncio.to_thread(_load_order, order_id)
+    if order is None:
+        subscription.close()
+        return JSONResponse(content={"error": "Order not found"}, status_code=404)
+    return StreamingResponse(
+        _order_status_stream(subscription, order),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+async def _order_status_stream(
+    subscription: Subscription[OrderStatusChanged], order: dict
+) -> AsyncIterator[str]:
+    with subscription:
+        yield f"data: {json.dumps(order)}\n\n"
+        while order["status"] not in FINAL_STATUSES:
+            try:
+                event = await asyncio.wait_for(subscription.get(), timeout=15)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            if event.order_id != order["order_id"] or event.status == order["status"]:
+                continue
+            order = {**order, "status": event.status}
+            yield f"data: {json.dumps(order)}\n\n"
+
+
+def _load_order(order_id: int) -> dict | None:
+    order = Vending(session=Session()).get_order(order_id)
+    if order is None:
+        return None
+    return _order_to_dict(order)
+
+
 class PaymentNotification(BaseModel):
     order_id: int
     status: str
 
 
-def _order_to_dict(order: Order) -> dict:
+@app.post("/payment/notifications")
+def payment_notification(notification: PaymentNotification) -> JSONResponse:
+    if notification.status == "DONE":
+        Vending.payment_received(notification.order_id)
+    return JSONResponse(content={"status": "ok"})
+
+
+def _version_etag(version: int) -> str:
+    return f'"{BOOT_ID}-{version}"'
+
+
+def _revalidate_headers(etag: str) -> dict[str, str]:
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is None:
+        return False
+    candidates = {candidate.strip() for candidate in if_none_match.split(",")}
+    return "*" in candidates or etag in candidates or f"W/{etag}" in candidates
+
+
+def _order_to_dict(order: Order | ArchivedOrder) -> dict:
     return {
         "order_id": order.id,
         "status": order.status,
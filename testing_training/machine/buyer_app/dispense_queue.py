@@ -0,0 +1,190 @@
+import logging
+import threading
+from collections import Counter, deque
+from datetime import datetime
+from typing import Callable
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import MappedAsDataclass, Mapped, Session, mapped_column
+
+from testing_training.machine.buyer_app.engines_controller import (
+    EnginesController,
+    UnexpectedResponse,
+)
+from testing_training.machine.buyer_app.order_events import (
+    OrderStatusChanged,
+    order_events,
+)
+from testing_training.machine.buyer_app.order_state import transition
+from testing_training.machine.database import Base, Session as MachineSession
+from testing_training.machine.inventory import (
+    get_reserved_engines,
+    lower_stock_on_engine,
+    release_reservation,
+)
+
+
+logger = logging.getLogger(__name__)
+
+OPEN_RETRY_INTERVAL = 1.0
+
+
+class DispenseJob(MappedAsDataclass, Base, unsafe_hash=True):
+    __tablename__ = "dispense_jobs"
+
+    order_id: Mapped[int] = mapped_column(primary_key=True)
+    enqueued_at: Mapped[datetime] = mapped_column()
+    started_at: Mapped[datetime | None] = mapped_column(default=None)
+
+
+class DispenseWorker:
+    def __init__(
+        self,
+        engines_controller_factory: Callable[[], EnginesController] = EnginesController,
+    ) -> None:
+        self._engines_controller_factory = engines_controller_factory
+        self._condition = threading.Condition()
+        self._queue: deque[int] = deque()
+        self._thread: threading.Thread | None = None
+        self._stopping = False
+
+    def enqueue(self, order_id: int) -> None:
+        with self._condition:
+            self._queue.append(order_id)
+            self._ensure_started()
+            self._condition.notify()
+
+    def start(self) -> None:
+        with self._condition:
+            self._ensure_started()
+
+    def stop(self) -> None:
+        with self._condition:
+            thread = self._thread
+            self._stopping = True
+            self._condition.notify()
+        if thread is not None:
+            thread.join(timeout=5)
+        with self._condition:
+            self._thread = None
+            self._stopping = False
+
+    def _ensure_started(self) -> None:
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._run, name="dispenser", daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        try:
+            engines_controller = self._open_engines_controller()
+            if engines_controller is None:
+                return
+            try:
+                try:
+                    self._resume()
+                except Exception:
+                    logger.exception("Failed to resume dispense jobs")
+
+                while True:
+                    with self._condition:
+                        while not self._queue and not self._stopping:
+                            self._condition.wait()
+                        if self._stopping:
+                            return
+                        order_id = self._queue.popleft()
+                    try:
+                        dispense(engines_controller, order_id)
+                    except Exception:
+                        logger.exception("Failed to dispense order %s", order_id)
+            finally:
+                engines_controller.close()
+        finally:
+            MachineSession.remove()
+            with self._condition:
+                if self._thread is threading.current_thread():
+                    self._thread = None
+
+    def _open_engines_controller(self) -> EnginesController | None:
+        while True:
+            try:
+                engines_controller = self._engines_controller_factory()
+                engines_controller.open()
+            except Exception:
+                logger.exception("Failed to open engines controller")
+            else:
+                return engines_controller
+            with self._condition:
+                if not self._stopping:
+                    self._condition.wait(OPEN_RETRY_INTERVAL)
+                if self._stopping:
+                    return None
+
+    def _resume(self) -> None:
+        stmt = select(DispenseJob).order_by(DispenseJob.enqueued_at)
+        with MachineSession() as session:
+            jobs = session.execute(stmt).scalars().all()
+            pending = [job.order_id for job in jobs if job.started_at is None]
+            interrupted = [job.order_id for job in jobs if job.started_at is not None]
+        with self._condition:
+            queued = set(self._queue)
+            self._queue.extendleft(
+                reversed([order_id for order_id in pending if order_id not in queued])
+            )
+        for order_id in interrupted:
+            fail_interrupted(order_id)
+
+
+def dispense(engines_controller: EnginesController, order_id: int) -> None:
+    with MachineSession() as session:
+        job = session.get(DispenseJob, order_id)
+        if job is None:
+            return
+        job.started_at = datetime.now()
+        session.commit()
+
+        plan = get_reserved_engines(order_id)
+        logger.info("Dispensing products from engines %s", plan)
+        try:
+            results = engines_controller.move_engines(plan)
+        except UnexpectedResponse as error:
+            logger.exception("Dispensing error!")
+            results = error.results
+            status = "DISPENSING_ERROR"
+        except Exception:
+            logger.exception("Dispensing error!")
+            results = []
+            status = "DISPENSING_ERROR"
+        else:
+            status = "DONE" if all(results) else "DISPENSING_ERROR"
+
+        dispensed = Counter(engine for engine, result in zip(plan, results) if result)
+        try:
+            for (engine_row, engine_column), quantity in dispensed.items():
+                lower_stock_on_engine(
+                    engine_row, engine_column, order_id=order_id, quantity=quantity
+                )
+            _finish(session, order_id, status)
+        except Exception:
+            logger.exception("Failed to finish dispensing order %s", order_id)
+            session.rollback()
+            fail_interrupted(order_id)
+            return
+    order_events.publish(OrderStatusChanged(order_id, status))
+
+
+def fail_interrupted(order_id: int) -> None:
+    with MachineSession() as session:
+        _finish(session, order_id, "DISPENSING_ERROR")
+    order_events.publish(OrderStatusChanged(order_id, "DISPENSING_ERROR"))
+
+
+def _finish(session: Session, order_id: int, status: str) -> None:
+    transition(session, order_id, "DISPENSING", status)
+    release_reservation(order_id)
+    session.execute(delete(DispenseJob).filter(DispenseJob.order_id == order_id))
+    session.commit()
+
+
+dispense_worker = DispenseWorker()
@@ -0,0 +1,68 @@
+from collections.abc import Sequence
+
+from testing_training.machine.config import MachineSettings
+from testing_training.myserial import ACK, FRAME_LENGTH, NACK
+
+ENGINE_CONTROLLER_ADDRESS = 0x02
+DRIVE_COMMAND = 0x13
+
+
+def encode_drive_into(
+    buffer: bytearray | memoryview,
+    offset: int,
+    engine_row: int,
+    engine_column: int,
+    steps: int = 1,
+) -> None:
+    engine_no = engine_row * 10 + engine_column
+    if not 0 <= engine_no <= 0xFF or not 0 <= steps <= 0xFF:
+        raise ValueError(
+            f"Engine ({engine_row}, {engine_column}) with {steps} steps does not fit in a frame"
+        )
+    buffer[offset] = ENGINE_CONTROLLER_ADDRESS
+    buffer[offset + 1] = DRIVE_COMMAND
+    buffer[offset + 2] = engine_no
+    buffer[offset + 3] = steps
+    buffer[offset + 4] = (
+        ENGINE_CONTROLLER_ADDRESS + DRIVE_COMMAND + engine_no + steps
+    ) & 0xFF
+
+
+def encode_drive(engine_row: int, engine_column: int, steps: int = 1) -> bytes:
+    frame = bytearray(FRAME_LENGTH)
+    encode_drive_into(frame, 0, engine_row, engine_column, steps)
+    return bytes(frame)
+
+
+class DriveFrames:
+    def __init__(self, settings: MachineSettings) -> None:
+        self._frames = {
+            (row, column): encode_drive(row, column)
+            for row in range(1, settings.SHELVES + 1)
+            for column in range(1, settings.ENGINES + 1)
+        }
+
+    def encode(
+        self, plan: Sequence[tuple[int, int]], steps: int = 1
+    ) -> bytes | bytearray:
+        if steps == 1:
+            try:
+                return b"".join([self._frames[engine] for engine in plan])
+            except KeyError:
+                pass
+
+        buffer = bytearray(FRAME_LENGTH * len(plan))
+        for index, (row, column) in enumerate(plan):
+            encode_drive_into(buffer, index * FRAME_LENGTH, row, column, steps)
+        return buffer
+
+
+def decode_response(response: bytes) -> bool | None:
+    if response == ACK:
+        return True
+    if response == NACK:
+        return False
+    return None
+
+
+drive_frames = DriveFrames(MachineSettings())
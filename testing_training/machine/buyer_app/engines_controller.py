@@ -1,4 +1,10 @@
-from testing_training.myserial import Serial, ACK, NACK
+import threading
+
+from testing_training.machine.buyer_app.engine_protocol import (
+    decode_response,
+    drive_frames,
+)
+from testing_training.myserial import Serial, SerialException, SerialTimeoutException
 
 
 class EnginesControllerException(Exception):
@@ -6,32 +12,69 @@ class EnginesControllerException(Exception):
 
 
 class UnexpectedResponse(EnginesControllerException):
-    pass
+    def __init__(self, results: list[bool]) -> None:
+        super().__init__(results)
+        self.results = results
 
 
 class EnginesController:
-    def __init__(self) -> None:
-        self._serial = Serial("/dev/ttyUSB0", timeout=1)
+    def __init__(self, address: str = "/dev/ttyUSB0", timeout: int = 1) -> None:
+        self._address = address
+        self._timeout = timeout
+        self._serial = Serial(address, timeout=timeout)
+        self._lock = threading.Lock()
 
     def open(self) -> None:
-        self._serial.open()
+        with self._lock:
+            self._serial.open()
 
     def close(self) -> None:
-        self._serial.closed()
+        with self._lock:
+            self._serial.close()
 
     def move_engine(self, engine_row: int, engine_column: int) -> bool:
-        engine_controller_address = 0x02
-        drive_command = 0x13
-        engine_no = engine_row * 10 + engine_column
-        steps = 0x1
-        frame = [engine_controller_address, drive_command, engine_no, steps]
-        frame_with_checksum = frame + [sum(frame) & 0xFF]
-        payload = bytes(frame_with_checksum)
-        self._serial.write(payload)
-        value = self._serial.read(length=2)
-        if value == ACK:
-            return True
-        elif value == NACK:
-            return False
-        else:
-            raise UnexpectedResponse()
+        return self.move_engines([(engine_row, engine_column)])[0]
+
+    def move_engines(self, plan: list[tuple[int, int]]) -> list[bool]:
+        if not plan:
+            return []
+        payload = drive_frames.encode(plan)
+        with self._lock:
+            try:
+                self._serial.write(payload)
+            except SerialException:
+                self._reconnect()
+                self._serial.write(payload)
+            responses = self._read_responses(len(plan))
+
+        results = []
+        unexpected = False
+        for response in responses:
+            if response is None:
+                results.append(False)
+                continue
+            result = decode_response(response)
+            if result is None:
+                unexpected = True
+                result = False
+            results.append(result)
+        if unexpected:
+            raise UnexpectedResponse(results)
+        return results
+
+    def _read_responses(self, frames: int) -> list[bytes | None]:
+        responses: list[bytes | None] = []
+        try:
+            for _ in range(frames):
+                responses.append(self._serial.read(length=2))
+        except (SerialException, SerialTimeoutException):
+            pass
+        return responses + [None] * (frames - len(responses))
+
+    def _reconnect(self) -> None:
+        try:
+            self._serial.close()
+        except SerialException:
+            pass
+        self._serial = Serial(self._address, timeout=self._timeout)
+        self._serial.open()
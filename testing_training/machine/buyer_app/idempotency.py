@@ -0,0 +1,45 @@
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+
+
+class IdempotencyKeyReused(Exception):
+    pass
+
+
+def request_hash(items: dict[int, int]) -> str:
+    canonical = json.dumps(sorted(items.items()))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class IdempotencyCache:
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._lock = threading.Lock()
+        self._responses: OrderedDict[str, tuple[str, dict]] = OrderedDict()
+
+    def get(self, key: str, request_hash: str) -> dict | None:
+        with self._lock:
+            entry = self._responses.get(key)
+            if entry is None:
+                return None
+            self._responses.move_to_end(key)
+        stored_hash, response = entry
+        if stored_hash != request_hash:
+            raise IdempotencyKeyReused(key)
+        return response
+
+    def put(self, key: str, request_hash: str, response: dict) -> None:
+        with self._lock:
+            self._responses[key] = (request_hash, response)
+            self._responses.move_to_end(key)
+            if len(self._responses) > self._max_size:
+                self._responses.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._responses.clear()
+
+
+placed_orders = IdempotencyCache(max_size=1024)
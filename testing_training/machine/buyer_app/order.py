@@ -2,6 +2,7 @@ from datetime import datetime
 from decimal import Decimal
 from typing import Literal
 
+from sqlalchemy import Index
 from sqlalchemy.dialects.sqlite import JSON
 from sqlalchemy.orm import MappedAsDataclass, Mapped, mapped_column, composite
 
@@ -11,6 +12,11 @@ from testing_training.machine.products import Money
 
 class Order(MappedAsDataclass, Base, unsafe_hash=True):
     __tablename__ = "orders"
+    __table_args__ = (
+        Index("ix_orders_idempotency_key", "idempotency_key", unique=True),
+        Index("ix_orders_status_created_at", "status", "created_at"),
+        {"sqlite_autoincrement": True},
+    )
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     created_at: Mapped[datetime] = mapped_column()
@@ -28,3 +34,10 @@ class Order(MappedAsDataclass, Base, unsafe_hash=True):
     _currency: Mapped[str] = mapped_column(init=False)
     total: Mapped[Money] = composite("_amount", "_currency")
     items: Mapped[dict[int, int]] = mapped_column(JSON)
+    idempotency_key: Mapped[str | None] = mapped_column(default=None)
+    request_hash: Mapped[str | None] = mapped_column(default=None)
+
+
+FINAL_STATUSES = frozenset(
+    {"DONE", "PAYMENT_TIMEOUT", "PAYMENT_FAILED", "DISPENSING_ERROR"}
+)
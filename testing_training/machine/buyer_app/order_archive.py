@@ -0,0 +1,96 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from sqlalchemy import Connection, delete, func, insert, select
+from sqlalchemy.dialects.sqlite import JSON
+from sqlalchemy.orm import MappedAsDataclass, Mapped, Session, composite, mapped_column
+
+from testing_training.machine.buyer_app.order import FINAL_STATUSES, Order
+from testing_training.machine.config import MachineSettings
+from testing_training.machine.database import Base, Session as MachineSession
+from testing_training.machine.products import Money
+
+
+logger = logging.getLogger(__name__)
+
+
+class ArchivedOrder(MappedAsDataclass, Base, unsafe_hash=True):
+    __tablename__ = "orders_archive"
+
+    id: Mapped[int] = mapped_column(init=False, primary_key=True, autoincrement=False)
+    created_at: Mapped[datetime] = mapped_column(index=True)
+    status: Mapped[str]
+    _amount: Mapped[Decimal] = mapped_column(init=False)
+    _currency: Mapped[str] = mapped_column(init=False)
+    total: Mapped[Money] = composite("_amount", "_currency")
+    items: Mapped[dict[int, int]] = mapped_column(JSON)
+    idempotency_key: Mapped[str | None] = mapped_column(default=None)
+    request_hash: Mapped[str | None] = mapped_column(default=None)
+
+
+def _max_archived_order_id(connection: Connection) -> int:
+    return connection.scalar(select(func.max(ArchivedOrder.id))) or 0
+
+
+Order.__table__.info["autoincrement_floor"] = _max_archived_order_id
+
+
+def find_order(session: Session, order_id: int) -> Order | ArchivedOrder | None:
+    return session.get(Order, order_id) or session.get(ArchivedOrder, order_id)
+
+
+def archive_orders(before: datetime, batch_size: int) -> int:
+    orders = Order.__table__
+    columns = [column.name for column in orders.columns]
+    ids_stmt = (
+        select(orders.c.id)
+        .filter(
+            orders.c.status.in_(FINAL_STATUSES),
+            orders.c.created_at < before,
+        )
+        .order_by(orders.c.created_at)
+        .limit(batch_size)
+    )
+
+    archived = 0
+    while True:
+        with MachineSession() as session:
+            order_ids = session.scalars(ids_stmt).all()
+            if not order_ids:
+                return archived
+            session.execute(
+                insert(ArchivedOrder.__table__).from_select(
+                    columns, select(orders).filter(orders.c.id.in_(order_ids))
+                )
+            )
+            session.execute(delete(orders).filter(orders.c.id.in_(order_ids)))
+            session.commit()
+        archived += len(order_ids)
+        if len(order_ids) < batch_size:
+            return archived
+
+
+class OrderArchiver:
+    def __init__(self, settings: MachineSettings, interval: timedelta) -> None:
+        self._retention = timedelta(days=settings.ORDER_RETENTION_DAYS)
+        self._batch_size = settings.ORDER_ARCHIVE_BATCH_SIZE
+        self._interval = interval
+
+    def archive(self) -> int:
+        return archive_orders(datetime.now() - self._retention, self._batch_size)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                archived = await asyncio.to_thread(self.archive)
+            except Exception:
+                logger.exception("Failed to archive orders")
+            else:
+                if archived:
+                    logger.info("Archived %s orders", archived)
+            await asyncio.sleep(self._interval.total_seconds())
+
+
+order_archiver = OrderArchiver(MachineSettings(), interval=timedelta(hours=1))
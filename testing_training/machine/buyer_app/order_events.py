@@ -0,0 +1,12 @@
+from dataclasses import dataclass
+
+from testing_training.machine.bus import Bus
+
+
+@dataclass(frozen=True)
+class OrderStatusChanged:
+    order_id: int
+    status: str
+
+
+order_events: Bus[OrderStatusChanged] = Bus()
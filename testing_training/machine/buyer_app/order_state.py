@@ -0,0 +1,39 @@
+from collections.abc import Iterable
+from types import MappingProxyType
+from typing import Mapping
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from testing_training.machine.buyer_app.order import Order
+
+TRANSITIONS: Mapping[str, frozenset[str]] = MappingProxyType(
+    {
+        "AWAITING_PAYMENT": frozenset(
+            {"DISPENSING", "PAYMENT_TIMEOUT", "PAYMENT_FAILED"}
+        ),
+        "DISPENSING": frozenset({"DONE", "DISPENSING_ERROR"}),
+    }
+)
+
+
+class IllegalTransition(Exception):
+    pass
+
+
+def transition(session: Session, order_id: int, expected: str, new: str) -> bool:
+    return bool(transition_many(session, [order_id], expected, new))
+
+
+def transition_many(
+    session: Session, order_ids: Iterable[int], expected: str, new: str
+) -> list[int]:
+    if new not in TRANSITIONS.get(expected, ()):
+        raise IllegalTransition(f"{expected} -> {new}")
+    stmt = (
+        update(Order)
+        .where(Order.id.in_(list(order_ids)), Order.status == expected)
+        .values(status=new)
+        .returning(Order.id)
+    )
+    return list(session.execute(stmt).scalars())
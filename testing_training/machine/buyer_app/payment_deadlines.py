@@ -0,0 +1,93 @@
+import asyncio
+import heapq
+import logging
+import threading
+from datetime import datetime, timedelta
+
+from sqlalchemy import select
+
+from testing_training.machine.buyer_app.order import Order
+from testing_training.machine.buyer_app.order_state import transition_many
+from testing_training.machine.buyer_app.order_events import (
+    OrderStatusChanged,
+    order_events,
+)
+from testing_training.machine.database import Session as MachineSession
+from testing_training.machine.inventory import release_reservation
+
+
+logger = logging.getLogger(__name__)
+
+PAYMENT_TIMEOUT = timedelta(seconds=5)
+
+
+class PaymentDeadlines:
+    def __init__(self, timeout: timedelta, tick: timedelta) -> None:
+        self._timeout = timeout
+        self._tick = tick
+        self._lock = threading.Lock()
+        self._heap: list[tuple[datetime, int]] = []
+        self._order_ids: set[int] = set()
+
+    def add(self, order_id: int, created_at: datetime) -> None:
+        with self._lock:
+            if order_id in self._order_ids:
+                return
+            self._order_ids.add(order_id)
+            heapq.heappush(self._heap, (created_at + self._timeout, order_id))
+
+    def pop_due(self, now: datetime) -> list[int]:
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                _, order_id = heapq.heappop(self._heap)
+                self._order_ids.discard(order_id)
+                due.append(order_id)
+        return due
+
+    def clear(self) -> None:
+        with self._lock:
+            self._heap.clear()
+            self._order_ids.clear()
+
+    def rebuild(self) -> None:
+        stmt = select(Order.id, Order.created_at).filter(
+            Order.status == "AWAITING_PAYMENT"
+        )
+        with MachineSession() as session:
+            for order_id, created_at in session.execute(stmt):
+                self.add(order_id, created_at)
+
+    async def run(self) -> None:
+        try:
+            await asyncio.to_thread(self.rebuild)
+        except Exception:
+            logger.exception("Failed to rebuild payment deadlines")
+
+        while True:
+            await asyncio.sleep(self._tick.total_seconds())
+            due = self.pop_due(datetime.now())
+            if not due:
+                continue
+            try:
+                await asyncio.to_thread(expire_orders, due)
+            except Exception:
+                logger.exception("Failed to expire orders %s", due)
+
+
+def expire_orders(order_ids: list[int]) -> list[int]:
+    with MachineSession() as session:
+        expired = transition_many(
+            session, order_ids, "AWAITING_PAYMENT", "PAYMENT_TIMEOUT"
+        )
+        for order_id in expired:
+            release_reservation(order_id)
+        session.commit()
+    for order_id in expired:
+        order_events.publish(OrderStatusChanged(order_id, "PAYMENT_TIMEOUT"))
+    return expired
+
+
+payment_deadlines = PaymentDeadlines(
+    timeout=PAYMENT_TIMEOUT, tick=timedelta(seconds=0.25)
+)
@@ -0,0 +1,81 @@
+import asyncio
+import concurrent.futures
+import threading
+from typing import Any, Callable, Coroutine, TypeVar
+
+T = TypeVar("T")
+
+
+class Scheduler:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._background: list[Callable[[], Coroutine[Any, Any, None]]] = []
+        self._shutdown: list[Callable[[], Coroutine[Any, Any, None]]] = []
+
+    def run_in_background(
+        self, factory: Callable[[], Coroutine[Any, Any, None]]
+    ) -> None:
+        with self._lock:
+            self._background.append(factory)
+            if self._loop is not None:
+                asyncio.run_coroutine_threadsafe(factory(), self._loop)
+
+    def run_on_shutdown(self, factory: Callable[[], Coroutine[Any, Any, None]]) -> None:
+        with self._lock:
+            self._shutdown.append(factory)
+
+    def start(self) -> None:
+        self._ensure_started()
+
+    def stop(self) -> None:
+        with self._lock:
+            loop, thread = self._loop, self._thread
+            self._loop, self._thread = None, None
+        if loop is None or thread is None:
+            return
+        loop.call_soon_threadsafe(loop.stop)
+        thread.join(timeout=5)
+
+    def submit(self, coroutine: Coroutine[Any, Any, T]) -> concurrent.futures.Future[T]:
+        return asyncio.run_coroutine_threadsafe(coroutine, self._ensure_started())
+
+    def _ensure_started(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(
+                    target=self._run,
+                    args=(self._loop, self._shutdown),
+                    name="scheduler",
+                    daemon=True,
+                )
+                self._thread.start()
+                for factory in self._background:
+                    asyncio.run_coroutine_threadsafe(factory(), self._loop)
+            return self._loop
+
+    @staticmethod
+    def _run(
+        loop: asyncio.AbstractEventLoop,
+        shutdown: list[Callable[[], Coroutine[Any, Any, None]]],
+    ) -> None:
+        asyncio.set_event_loop(loop)
+        try:
+            loop.run_forever()
+            loop.run_until_complete(
+                asyncio.gather(
+                    *(factory() for factory in shutdown), return_exceptions=True
+                )
+            )
+            tasks = asyncio.all_tasks(loop)
+            for task in tasks:
+                task.cancel()
+            loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            loop.run_until_complete(loop.shutdown_default_executor())
+        finally:
+            loop.close()
+
+
+scheduler = Scheduler()
@@ -0,0 +1,78 @@
+import asyncio
+from typing import Any
+
+import httpx
+
+from testing_training.machine.config import MachineSettings
+from testing_training.machine.products import Money
+
+
+class TerminalClient:
+    def __init__(self, settings: MachineSettings) -> None:
+        self._settings = settings
+        self._client: httpx.AsyncClient | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self.requests = 0
+        self.connections_opened = 0
+
+    @property
+    def connections_reused(self) -> int:
+        return self.requests - self.connections_opened
+
+    async def start_payment(self, order_id: int, total: Money) -> None:
+        payload = {
+            "order": {
+                "id": str(order_id),
+                "price": {
+                    "currency": total.currency.name,
+                    "amount": str(total.minor_units),
+                },
+                "description": f"Payment for order #{order_id}",
+            },
+            "technical_info": {
+                "notification_url": self._settings.PAYMENT_NOTIFICATION_URL,
+            },
+        }
+        response = await self._request("POST", "/v1/order", json=payload)
+        response.raise_for_status()
+
+    async def get_payment_status(self, order_id: int) -> str:
+        response = await self._request("GET", f"/v1/order/{order_id}")
+        return response.json()["status"]
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+            self._loop = None
+
+    async def _request(self, method: str, url: str, **kwargs: Any) -> httpx.Response:
+        self.requests += 1
+        return await self._get_client().request(
+            method, url, extensions={"trace": self._trace}, **kwargs
+        )
+
+    async def _trace(self, event_name: str, info: dict) -> None:
+        if event_name == "connection.connect_tcp.complete":
+            self.connections_opened += 1
+
+    def _get_client(self) -> httpx.AsyncClient:
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._loop is not loop:
+            limits = httpx.Limits(
+                max_connections=self._settings.TERMINAL_MAX_CONNECTIONS,
+                max_keepalive_connections=self._settings.TERMINAL_MAX_KEEPALIVE_CONNECTIONS,
+            )
+            transport = httpx.AsyncHTTPTransport(
+                retries=self._settings.TERMINAL_RETRIES, limits=limits
+            )
+            self._client = httpx.AsyncClient(
+                base_url=self._settings.TERMINAL_URL,
+                transport=transport,
+                timeout=self._settings.TERMINAL_TIMEOUT,
+            )
+            self._loop = loop
+        return self._client
+
+
+terminal_client = TerminalClient(MachineSettings())
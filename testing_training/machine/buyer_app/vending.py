@@ -1,168 +1,168 @@
+import asyncio
+import concurrent.futures
 import time
 import logging
-from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
-from typing import cast
 
 import httpx
 from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from testing_training.machine.database import Session as MachineSession
 
-from testing_training.machine.products import list_products, Money
-from testing_training.machine.inventory import (
-    get_engine_with_product,
-    lower_stock_on_engine,
+from testing_training.machine.products import catalog, Money
+from testing_training.machine.inventory import release_reservation, reserve_stock
+from testing_training.machine.buyer_app.dispense_queue import (
+    DispenseJob,
+    dispense_worker,
+)
+from testing_training.machine.buyer_app.idempotency import (
+    IdempotencyKeyReused,
+    request_hash,
 )
 from testing_training.machine.buyer_app.order import Order
-from testing_training.myserial import Serial, ACK, NACK
+from testing_training.machine.buyer_app.order_archive import (
+    ArchivedOrder,
+    find_order,
+    order_archiver,
+)
+from testing_training.machine.buyer_app.order_state import transition
+from testing_training.machine.buyer_app.order_events import (
+    OrderStatusChanged,
+    order_events,
+)
+from testing_training.machine.buyer_app.payment_deadlines import (
+    PAYMENT_TIMEOUT,
+    payment_deadlines,
+)
+from testing_training.machine.buyer_app.scheduler import scheduler
+from testing_training.machine.buyer_app.terminal_client import terminal_client
 
 
 logger = logging.getLogger(__name__)
 
+scheduler.run_in_background(payment_deadlines.run)
+scheduler.run_in_background(order_archiver.run)
+scheduler.run_on_shutdown(terminal_client.aclose)
+
+FIRST_POLL_DELAY = 1.0
+MAX_POLL_DELAY = 4.0
+
+_notified_order_ids: set[int] = set()
+
 
 class Vending:
-    def __init__(self, session: Session | None = None) -> None:
+    def __init__(
+        self,
+        session: Session | None = None,
+    ) -> None:
         self._session = session or MachineSession()
-        self._threadpool = ThreadPoolExecutor(max_workers=4)
 
-    def place_order(self, items: dict[int, int]) -> Order:
-        all_products = list_products()
-        product_by_id = {product.id: product for product in all_products}
+    def place_order(
+        self, items: dict[int, int], idempotency_key: str | None = None
+    ) -> Order:
+        product_by_id = catalog.by_id()
 
-        total = sum(
-            product_by_id[product_id].price * quantity
-            for product_id, quantity in items.items()
+        total = Money.sum_products(
+            (product_by_id[product_id].price for product_id in items), items.values()
         )
-        total = cast(Money, total)
 
         order = Order(
             created_at=datetime.now(),
             status="AWAITING_PAYMENT",
             total=total,
             items=items,
+            idempotency_key=idempotency_key,
+            request_hash=request_hash(items) if idempotency_key else None,
         )
         self._session.add(order)
-        self._session.flush()
+        try:
+            self._session.flush()
+        except IntegrityError:
+            if idempotency_key is None:
+                raise
+            self._session.rollback()
+            stmt = select(Order).filter(Order.idempotency_key == idempotency_key)
+            placed = self._session.execute(stmt).scalars().one()
+            if placed.request_hash not in (None, order.request_hash):
+                raise IdempotencyKeyReused(idempotency_key)
+            return placed
 
         order_id = order.id
+        reserve_stock(order_id, items)
         try:
             wake_up_terminal_and_start_payment(order_id=order_id, total=total)
         except httpx.HTTPError:
-            order.status = "PAYMENT_FAILED"
+            transition(self._session, order_id, "AWAITING_PAYMENT", "PAYMENT_FAILED")
+            release_reservation(order_id)
         else:
-            self._threadpool.submit(
-                self._timeout_order_after,
-                order_id=order_id,
-                timeout=timedelta(seconds=5),
+            payment_deadlines.add(order_id, order.created_at)
+            scheduler.submit(
+                self._await_payment(order_id=order_id, timeout=PAYMENT_TIMEOUT)
             )
 
-            def poll_for_success(order_id: int) -> None:
-                start = time.monotonic()
-                while time.monotonic() - start < 5:
-                    time.sleep(0.25)
-                    response = httpx.get(f"http://localhost:8090/v1/order/{order_id}")
-                    if response.json()["status"] != "DONE":
-                        continue
-
-                    with MachineSession() as session:
-                        vending = Vending(session=session)
-                        vending._payment_successful(order_id)
-                        session.commit()
-
-                    return
-
-            self._threadpool.submit(poll_for_success, order_id)
-
         return order
 
-    def get_order(self, order_id: int) -> Order | None:
+    def get_order(self, order_id: int) -> Order | ArchivedOrder | None:
         self._session.rollback()
-        stmt = select(Order).filter(Order.id == order_id)
-        return self._session.execute(stmt).scalars().first()
+        return find_order(self._session, order_id)
 
     @staticmethod
-    def _timeout_order_after(order_id: int, timeout: timedelta) -> None:
-        time.sleep(timeout.total_seconds())
-        stmt = (
-            select(Order)
-            .filter(
-                Order.id == order_id,
-                Order.status == "AWAITING_PAYMENT",
-            )
-            .with_for_update()
-        )
+    def payment_received(order_id: int) -> concurrent.futures.Future[None]:
+        return scheduler.submit(Vending._confirm_payment(order_id))
 
-        with MachineSession() as session:
-            orders = session.execute(stmt).scalars().all()
-            for order in orders:
-                order.status = "PAYMENT_TIMEOUT"
-            session.commit()
-
-    def _payment_successful(self, order_id: int) -> None:
-        stmt = (
-            select(Order)
-            .filter(
-                Order.id == order_id,
-            )
-            .with_for_update()
-        )
+    @staticmethod
+    async def _confirm_payment(order_id: int) -> None:
+        try:
+            status = await terminal_client.get_payment_status(order_id)
+        except httpx.HTTPError:
+            logger.warning("Could not confirm payment of order %s", order_id)
+            return
+        if status != "DONE":
+            logger.warning("Ignoring unconfirmed payment of order %s", order_id)
+            return
 
-        order = self._session.execute(stmt).scalars().first()
-        order.status = "DISPENSING"
+        _notified_order_ids.add(order_id)
+        await asyncio.to_thread(Vending._dispense, order_id)
 
-        self._session.commit()
+    @staticmethod
+    async def _await_payment(order_id: int, timeout: timedelta) -> None:
+        deadline = time.monotonic() + timeout.total_seconds()
+        delay = FIRST_POLL_DELAY
+        while time.monotonic() + delay < deadline:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, MAX_POLL_DELAY)
+            if order_id in _notified_order_ids:
+                return
+            try:
+                status = await terminal_client.get_payment_status(order_id)
+            except httpx.HTTPError:
+                continue
+            if status != "DONE":
+                continue
+
+            await asyncio.to_thread(Vending._dispense, order_id)
+            return
 
+    @staticmethod
+    def _dispense(order_id: int) -> None:
         try:
-            product_id_quantity = order.items.copy()
-            for product_id, quantity in product_id_quantity.items():
-                for _ in range(quantity):
-                    engine_row, engine_column = get_engine_with_product(product_id)
-                    print(
-                        f"Dispensing {quantity} of product {product_id} from engine {engine_row}, {engine_column}"
-                    )
-                    serial = Serial("/dev/ttyUSB0", timeout=1)
-                    serial.open()
-                    engine_controller_address = 0x02
-                    drive_command = 0x13
-                    engine_no = engine_row * 10 + engine_column
-                    steps = 0x1
-                    frame = [engine_controller_address, drive_command, engine_no, steps]
-                    frame_with_checksum = frame + [sum(frame) & 0xFF]
-                    payload = bytes(frame_with_checksum)
-                    serial.write(payload)
-                    response = serial.read(length=2)
-                    if response == ACK:
-                        lower_stock_on_engine(engine_row, engine_column)
-                    elif response == NACK:
-                        raise Exception("Dispensing error")
-        except Exception:
-            logger.exception("Dispensing error!")
-            order.status = "DISPENSING_ERROR"
-        else:
-            stmt = select(Order).filter(Order.id == order_id).with_for_update()
-
-            order = self._session.execute(stmt).scalars().first()
-            order.status = "DONE"
+            with MachineSession() as session:
+                vending = Vending(session=session)
+                vending._payment_successful(order_id)
+                session.commit()
+        finally:
+            _notified_order_ids.discard(order_id)
 
+    def _payment_successful(self, order_id: int) -> None:
+        if not transition(self._session, order_id, "AWAITING_PAYMENT", "DISPENSING"):
+            self._session.rollback()
+            return
+        self._session.add(DispenseJob(order_id=order_id, enqueued_at=datetime.now()))
         self._session.commit()
+        order_events.publish(OrderStatusChanged(order_id, "DISPENSING"))
+        dispense_worker.enqueue(order_id)
 
 
 def wake_up_terminal_and_start_payment(order_id: int, total: Money) -> None:
-    payload = {
-        "order": {
-            "id": str(order_id),
-            "price": {
-                "currency": total.currency.name,
-                "amount": str((total.amount * 100).quantize(0)),
-            },
-            "description": f"Payment for order #{order_id}",
-        },
-        "technical_info": {
-            "notification_url": "http://localhost:8000/payment/notifications",
-        },
-    }
-    transport = httpx.HTTPTransport(retries=5)
-    client = httpx.Client(base_url="http://localhost:8090", transport=transport)
-    response = client.post("/v1/order", json=payload)
-    response.raise_for_status()
+    scheduler.submit(terminal_client.start_payment(order_id, total)).result()
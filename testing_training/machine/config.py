@@ -4,3 +4,19 @@ from pydantic_settings import BaseSettings
 class MachineSettings(BaseSettings):
     SHELVES: int = 6
     ENGINES: int = 6
+    TERMINAL_URL: str = "http://localhost:8090"
+    TERMINAL_TIMEOUT: float = 5.0
+    TERMINAL_RETRIES: int = 5
+    TERMINAL_MAX_CONNECTIONS: int = 10
+    TERMINAL_MAX_KEEPALIVE_CONNECTIONS: int = 5
+    PAYMENT_NOTIFICATION_URL: str = "http://localhost:9090/payment/notifications"
+    ORDER_RETENTION_DAYS: int = 30
+    ORDER_ARCHIVE_BATCH_SIZE: int = 500
+    DB_ENGINE_URL: str | None = None
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    SQLITE_JOURNAL_MODE: str = "WAL"
+    SQLITE_SYNCHRONOUS: str = "NORMAL"
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
+    SQLITE_MMAP_SIZE: int = 64 * 1024 * 1024
+    SQLITE_CACHE_SIZE: int = -8000
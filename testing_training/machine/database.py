@@ -1,8 +1,22 @@
-import os
 from pathlib import Path
 
-from sqlalchemy import create_engine
+from sqlalchemy import (
+    Column,
+    Connection,
+    Engine,
+    MetaData,
+    Table,
+    create_engine,
+    event,
+    inspect,
+    make_url,
+    text,
+)
 from sqlalchemy.orm import DeclarativeBase, sessionmaker, scoped_session
+from sqlalchemy.pool import QueuePool, StaticPool
+from sqlalchemy.schema import CreateColumn, CreateTable
+
+from testing_training.machine.config import MachineSettings
 
 
 class Base(DeclarativeBase):
@@ -11,6 +25,127 @@ class Base(DeclarativeBase):
 
 DATABASE_PATH = Path(__file__).parent / "machine.db"
 
-engine_url = os.environ.get("DB_ENGINE_URL") or f"sqlite:///{DATABASE_PATH}"
-engine = create_engine(engine_url)
+
+def create_machine_engine(settings: MachineSettings) -> Engine:
+    url = make_url(settings.DB_ENGINE_URL or f"sqlite:///{DATABASE_PATH}")
+    if url.get_backend_name() != "sqlite":
+        return create_engine(url)
+
+    if url.database in (None, "", ":memory:"):
+        engine = create_engine(
+            url,
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+        )
+    else:
+        engine = create_engine(
+            url,
+            poolclass=QueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            connect_args={"check_same_thread": False},
+        )
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        cursor.execute(f"PRAGMA journal_mode={settings.SQLITE_JOURNAL_MODE}")
+        cursor.execute(f"PRAGMA synchronous={settings.SQLITE_SYNCHRONOUS}")
+        cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS:d}")
+        cursor.execute(f"PRAGMA mmap_size={settings.SQLITE_MMAP_SIZE:d}")
+        cursor.execute(f"PRAGMA cache_size={settings.SQLITE_CACHE_SIZE:d}")
+        cursor.close()
+
+    return engine
+
+
+class MigrationError(Exception):
+    pass
+
+
+def migrate(bind: Engine) -> None:
+    Base.metadata.create_all(bind)
+    inspector = inspect(bind)
+    with bind.begin() as connection:
+        for table in Base.metadata.sorted_tables:
+            existing_columns = {
+                column["name"] for column in inspector.get_columns(table.name)
+            }
+            for column in table.columns:
+                if column.name not in existing_columns:
+                    _add_column(connection, table.name, column)
+            if _lacks_autoincrement(connection, table):
+                _rebuild_table(connection, table)
+            for index in table.indexes:
+                index.create(connection, checkfirst=True)
+
+
+def _add_column(connection: Connection, table_name: str, column: Column) -> None:
+    if column.nullable or column.server_default is not None:
+        column_ddl = CreateColumn(column).compile(dialect=connection.dialect)
+        connection.execute(text(f"ALTER TABLE {table_name} ADD COLUMN {column_ddl}"))
+        return
+
+    backfill = column.info.get("backfill")
+    if backfill is None:
+        raise MigrationError(
+            f"Cannot add NOT NULL column {table_name}.{column.name} "
+            "without a server default or a backfill"
+        )
+    preparer = connection.dialect.identifier_preparer
+    column_type = column.type.compile(dialect=connection.dialect)
+    connection.execute(
+        text(
+            f"ALTER TABLE {table_name} "
+            f"ADD COLUMN {preparer.quote(column.name)} {column_type}"
+        )
+    )
+    backfill(connection)
+
+
+def _lacks_autoincrement(connection: Connection, table: Table) -> bool:
+    if connection.dialect.name != "sqlite":
+        return False
+    if not table.dialect_options["sqlite"]["autoincrement"]:
+        return False
+    table_sql = connection.scalar(
+        text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"),
+        {"name": table.name},
+    )
+    return "AUTOINCREMENT" not in table_sql.upper()
+
+
+def _rebuild_table(connection: Connection, table: Table) -> None:
+    new_table = table.to_metadata(MetaData(), name=f"_{table.name}_new")
+    preparer = connection.dialect.identifier_preparer
+    columns = ", ".join(preparer.quote(column.name) for column in table.columns)
+    connection.execute(CreateTable(new_table))
+    connection.execute(
+        text(
+            f"INSERT INTO {new_table.name} ({columns}) "
+            f"SELECT {columns} FROM {table.name}"
+        )
+    )
+    connection.execute(text(f"DROP TABLE {table.name}"))
+    connection.execute(text(f"ALTER TABLE {new_table.name} RENAME TO {table.name}"))
+
+    autoincrement_floor = table.info.get("autoincrement_floor")
+    if autoincrement_floor is not None:
+        _raise_sequence(connection, table.name, autoincrement_floor(connection))
+
+
+def _raise_sequence(connection: Connection, table_name: str, floor: int) -> None:
+    params = {"name": table_name, "seq": floor}
+    updated = connection.execute(
+        text("UPDATE sqlite_sequence SET seq = max(seq, :seq) WHERE name = :name"),
+        params,
+    )
+    if not updated.rowcount:
+        connection.execute(
+            text("INSERT INTO sqlite_sequence (name, seq) VALUES (:name, :seq)"),
+            params,
+        )
+
+
+engine = create_machine_engine(MachineSettings())
 Session = scoped_session(sessionmaker(bind=engine))
@@ -1,15 +1,39 @@
+from testing_training.machine.inventory.changes import (
+    inventory_feed,
+    InventoryChanged,
+)
 from testing_training.machine.inventory.services import (
     get_inventory,
     get_engine_with_product,
+    get_reserved_engines,
     lower_stock_on_engine,
+    plan_dispense,
+    refresh_inventory_feed,
+    release_reservation,
+    reserve_stock,
     set_stock_on_engine,
+    set_stock_on_engines,
+    EngineStock,
     Entry,
+    NotEnoughStock,
+    StockReserved,
 )
 
 __all__ = [
     "get_inventory",
     "get_engine_with_product",
+    "get_reserved_engines",
+    "inventory_feed",
+    "EngineStock",
     "Entry",
+    "InventoryChanged",
+    "NotEnoughStock",
     "lower_stock_on_engine",
+    "plan_dispense",
+    "refresh_inventory_feed",
+    "release_reservation",
+    "reserve_stock",
     "set_stock_on_engine",
+    "set_stock_on_engines",
+    "StockReserved",
 ]
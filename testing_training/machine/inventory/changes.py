@@ -0,0 +1,66 @@
+import threading
+from collections import deque
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Callable, Mapping
+
+from testing_training.machine.bus import Bus
+
+
+@dataclass(frozen=True)
+class InventoryChanged:
+    version: int
+    quantities: Mapping[int, int]
+
+
+class InventoryFeed:
+    def __init__(self, history: int) -> None:
+        self._lock = threading.Lock()
+        self._version = 0
+        self._source_version = 0
+        self._history: deque[InventoryChanged] = deque(maxlen=history)
+        self.bus: Bus[InventoryChanged] = Bus()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def publish(self, quantities: dict[int, int]) -> InventoryChanged:
+        return self.publish_loaded(lambda: quantities)
+
+    def publish_loaded(self, load: Callable[[], dict[int, int]]) -> InventoryChanged:
+        with self._lock:
+            return self._append(load())
+
+    def sync(
+        self,
+        source_version: int,
+        load: Callable[[bool], dict[int, int]],
+        force: bool = False,
+    ) -> InventoryChanged | None:
+        with self._lock:
+            if source_version == self._source_version and not force:
+                return None
+            missed_changes = source_version != self._source_version + 1
+            self._source_version = source_version
+            return self._append(load(missed_changes))
+
+    def _append(self, quantities: dict[int, int]) -> InventoryChanged:
+        self._version += 1
+        change = InventoryChanged(self._version, MappingProxyType(quantities))
+        self._history.append(change)
+        self.bus.publish(change)
+        return change
+
+    def changes_since(self, version: int) -> list[InventoryChanged] | None:
+        with self._lock:
+            if version > self._version:
+                return None
+            if version == self._version:
+                return []
+            if not self._history or self._history[0].version > version + 1:
+                return None
+            return [change for change in self._history if change.version > version]
+
+
+inventory_feed = InventoryFeed(history=256)
@@ -9,4 +9,4 @@ class Engine(MappedAsDataclass, Base, unsafe_hash=True):
 
     row: Mapped[int] = mapped_column(primary_key=True)
     column: Mapped[int] = mapped_column(primary_key=True)
-    stock_id: Mapped[int | None] = mapped_column(ForeignKey("stocks.id"))
+    stock_id: Mapped[int | None] = mapped_column(ForeignKey("stocks.id"), index=True)
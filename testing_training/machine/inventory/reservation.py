@@ -0,0 +1,12 @@
+from sqlalchemy import ForeignKey
+from sqlalchemy.orm import MappedAsDataclass, Mapped, mapped_column
+
+from testing_training.machine.database import Base
+
+
+class Reservation(MappedAsDataclass, Base, unsafe_hash=True):
+    __tablename__ = "reservations"
+
+    order_id: Mapped[int] = mapped_column(primary_key=True)
+    stock_id: Mapped[int] = mapped_column(ForeignKey("stocks.id"), primary_key=True)
+    quantity: Mapped[int]
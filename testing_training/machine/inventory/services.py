@@ -1,11 +1,34 @@
-from collections import defaultdict
+from collections import Counter, defaultdict
+from collections.abc import Iterable
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import select
+from sqlalchemy import (
+    Connection,
+    Engine as SAEngine,
+    event,
+    func,
+    insert,
+    select,
+    tuple_,
+    update,
+)
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session as SASession
 
 from testing_training.machine.database import Session
+from testing_training.machine.inventory.changes import inventory_feed
 from testing_training.machine.inventory.engine import Engine
+from testing_training.machine.inventory.reservation import Reservation
 from testing_training.machine.inventory.stock import Stock
+from testing_training.machine.inventory.version import InventoryVersion
+
+
+class NotEnoughStock(Exception):
+    pass
+
+
+class StockReserved(Exception):
+    pass
 
 
 class Entry(BaseModel):
@@ -15,59 +38,307 @@ class Entry(BaseModel):
     quantity: int
 
 
-def get_inventory() -> list[Entry]:
-    session = Session()
-    stocks = session.execute(select(Stock)).scalars().all()
-    quantity_by_product_id: dict[int, int] = defaultdict(int)
-    for stock in stocks:
-        quantity_by_product_id[stock.product_id] += stock.quantity
+class EngineStock(BaseModel):
+    model_config = ConfigDict(frozen=True)
+
+    row: int
+    column: int
+    product_id: int
+    quantity: int
+
 
+def get_inventory(product_ids: Iterable[int] | None = None) -> list[Entry]:
+    session = Session()
     return [
-        Entry(product_id=product_id, quantity=quantity)
-        for product_id, quantity in quantity_by_product_id.items()
+        Entry.model_construct(product_id=product_id, quantity=quantity)
+        for product_id, quantity in _available_quantities(session, product_ids)
     ]
 
 
-def get_engine_with_product(product_id: int) -> tuple[int, int]:
+def _available_quantities(
+    session: SASession | Connection, product_ids: Iterable[int] | None = None
+) -> list[tuple[int, int]]:
+    stmt = select(Stock.product_id, func.sum(Stock.quantity - Stock.reserved)).group_by(
+        Stock.product_id
+    )
+    if product_ids is not None:
+        stmt = stmt.filter(Stock.product_id.in_(list(product_ids)))
+    return [(product_id, quantity) for product_id, quantity in session.execute(stmt)]
+
+
+def get_engine_with_product(product_id: int) -> tuple[int, int] | None:
     session = Session()
-    stmt = select(Stock).filter(Stock.product_id == product_id, Stock.quantity > 0)
-    stock = session.execute(stmt).scalars().first()
-    engine = (
-        session.execute(select(Engine).filter(Engine.stock_id == stock.id))
-        .scalars()
-        .first()
+    stmt = (
+        select(Engine.row, Engine.column)
+        .join(Stock, Engine.stock_id == Stock.id)
+        .filter(Stock.product_id == product_id, Stock.quantity > 0)
+        .order_by(Engine.row, Engine.column)
+        .limit(1)
     )
+    engine = session.execute(stmt).first()
+    if engine is None:
+        return None
     return engine.row, engine.column
 
 
-def lower_stock_on_engine(row: int, column: int) -> None:
+def plan_dispense(items: dict[int, int]) -> list[tuple[int, int]]:
+    session = Session()
+    return [(row, column) for row, column, _ in _allocate(session, items)]
+
+
+def reserve_stock(order_id: int, items: dict[int, int]) -> list[tuple[int, int]]:
     session = Session()
-    stmt = select(Engine).filter(Engine.row == row, Engine.column == column)
-    engine = session.execute(stmt).scalars().first()
-    stock = (
-        session.execute(select(Stock).filter(Stock.id == engine.stock_id))
+    units = _allocate(session, items)
+    for stock_id, quantity in Counter(stock_id for _, _, stock_id in units).items():
+        result = session.execute(
+            update(Stock)
+            .where(Stock.id == stock_id, Stock.quantity - Stock.reserved >= quantity)
+            .values(reserved=Stock.reserved + quantity)
+        )
+        if result.rowcount != 1:
+            raise NotEnoughStock([stock_id])
+        session.add(
+            Reservation(order_id=order_id, stock_id=stock_id, quantity=quantity)
+        )
+    session.flush()
+    _mark_inventory_changed(session, items)
+    return [(row, column) for row, column, _ in units]
+
+
+def get_reserved_engines(order_id: int) -> list[tuple[int, int]]:
+    session = Session()
+    stmt = (
+        select(Engine.row, Engine.column, Reservation.quantity)
+        .join(Reservation, Engine.stock_id == Reservation.stock_id)
+        .filter(Reservation.order_id == order_id)
+        .order_by(Engine.row, Engine.column)
+    )
+    return [
+        (row, column)
+        for row, column, quantity in session.execute(stmt)
+        for _ in range(quantity)
+    ]
+
+
+def release_reservation(order_id: int) -> None:
+    session = Session()
+    reservations = (
+        session.execute(select(Reservation).filter(Reservation.order_id == order_id))
         .scalars()
-        .first()
+        .all()
     )
-    stock.quantity = stock.quantity - 1
+    for reservation in reservations:
+        product_id = session.execute(
+            update(Stock)
+            .where(Stock.id == reservation.stock_id)
+            .values(reserved=Stock.reserved - reservation.quantity)
+            .returning(Stock.product_id)
+        ).scalar_one()
+        session.delete(reservation)
+        _mark_inventory_changed(session, [product_id])
+    session.flush()
 
 
-def set_stock_on_engine(row: int, column: int, product_id: int, quantity: int) -> None:
+def _allocate(session: SASession, items: dict[int, int]) -> list[tuple[int, int, int]]:
+    available = Stock.quantity - Stock.reserved
+    stmt = (
+        select(Engine.row, Engine.column, Stock.id, Stock.product_id, available)
+        .join(Stock, Engine.stock_id == Stock.id)
+        .filter(Stock.product_id.in_(list(items)), available > 0)
+        .order_by(Engine.row, Engine.column)
+        .with_for_update()
+    )
+    available_by_product_id: dict[int, list[list[int]]] = defaultdict(list)
+    for row, column, stock_id, product_id, quantity in session.execute(stmt):
+        available_by_product_id[product_id].append([row, column, stock_id, quantity])
+
+    missing_product_ids = [
+        product_id
+        for product_id, quantity in items.items()
+        if sum(engine[3] for engine in available_by_product_id[product_id]) < quantity
+    ]
+    if missing_product_ids:
+        raise NotEnoughStock(missing_product_ids)
+
+    units = []
+    for product_id, quantity in items.items():
+        engines = available_by_product_id[product_id]
+        while quantity > 0:
+            for engine in engines:
+                if quantity == 0:
+                    break
+                if engine[3] > 0:
+                    engine[3] -= 1
+                    quantity -= 1
+                    units.append((engine[0], engine[1], engine[2]))
+    return units
+
+
+def lower_stock_on_engine(
+    row: int, column: int, order_id: int | None = None, quantity: int = 1
+) -> int:
     session = Session()
-    stmt = select(Engine).filter(Engine.row == row, Engine.column == column)
-    engine = session.execute(stmt).scalars().first()
-    if engine is None:
-        stock = Stock(product_id=product_id, quantity=quantity)
-        session.add(stock)
-        session.flush()
-        engine = Engine(row=row, column=column, stock_id=stock.id)
-        session.add(engine)
-        session.flush()
+    stock_id = (
+        select(Engine.stock_id)
+        .where(Engine.row == row, Engine.column == column)
+        .scalar_subquery()
+    )
+    stmt = update(Stock).where(Stock.id == stock_id, Stock.quantity >= quantity)
+    if order_id is None:
+        stmt = stmt.values(quantity=Stock.quantity - quantity)
     else:
-        stock = (
-            session.execute(select(Stock).filter(Stock.id == engine.stock_id))
-            .scalars()
-            .first()
+        stmt = stmt.where(Stock.reserved >= quantity).values(
+            quantity=Stock.quantity - quantity, reserved=Stock.reserved - quantity
         )
-    stock.quantity = quantity
-    session.flush()
+    lowered = session.execute(
+        stmt.returning(Stock.id, Stock.product_id, Stock.quantity)
+    ).first()
+    if lowered is None:
+        raise NotEnoughStock([(row, column)])
+
+    if order_id is None:
+        _mark_inventory_changed(session, [lowered.product_id])
+    else:
+        session.execute(
+            update(Reservation)
+            .where(Reservation.order_id == order_id, Reservation.stock_id == lowered.id)
+            .values(quantity=Reservation.quantity - quantity)
+        )
+    return lowered.quantity
+
+
+def set_stock_on_engine(row: int, column: int, product_id: int, quantity: int) -> None:
+    set_stock_on_engines(
+        [EngineStock(row=row, column=column, product_id=product_id, quantity=quantity)]
+    )
+
+
+def set_stock_on_engines(entries: Iterable[EngineStock]) -> None:
+    session = Session()
+    entry_by_engine = {(entry.row, entry.column): entry for entry in entries}
+    if not entry_by_engine:
+        return
+
+    stmt = (
+        select(Engine.row, Engine.column, Stock.id, Stock.product_id, Stock.reserved)
+        .join(Stock, Engine.stock_id == Stock.id)
+        .filter(tuple_(Engine.row, Engine.column).in_(list(entry_by_engine)))
+    )
+    stock_by_engine = {
+        (row, column): (stock_id, product_id, reserved)
+        for row, column, stock_id, product_id, reserved in session.execute(stmt)
+    }
+    reserved_engines = [
+        engine
+        for engine, (_, product_id, reserved) in stock_by_engine.items()
+        if reserved
+        and (
+            entry_by_engine[engine].product_id != product_id
+            or entry_by_engine[engine].quantity < reserved
+        )
+    ]
+    if reserved_engines:
+        raise StockReserved(reserved_engines)
+
+    updated = [
+        {
+            "id": stock_by_engine[engine][0],
+            "product_id": entry.product_id,
+            "quantity": entry.quantity,
+        }
+        for engine, entry in entry_by_engine.items()
+        if engine in stock_by_engine
+    ]
+    missing = [
+        entry
+        for engine, entry in entry_by_engine.items()
+        if engine not in stock_by_engine
+    ]
+
+    if updated:
+        session.execute(update(Stock), updated)
+    if missing:
+        # RETURNING order is not guaranteed on SQLite, but stocks created with
+        # the same product and quantity are interchangeable.
+        created = session.execute(
+            insert(Stock).returning(Stock.id, Stock.product_id, Stock.quantity),
+            [
+                {"product_id": entry.product_id, "quantity": entry.quantity}
+                for entry in missing
+            ],
+        )
+        stock_ids: dict[tuple[int, int], list[int]] = defaultdict(list)
+        for stock_id, product_id, quantity in created:
+            stock_ids[product_id, quantity].append(stock_id)
+        upsert = sqlite_insert(Engine)
+        session.execute(
+            upsert.on_conflict_do_update(
+                index_elements=[Engine.row, Engine.column],
+                set_={"stock_id": upsert.excluded.stock_id},
+            ),
+            [
+                {
+                    "row": entry.row,
+                    "column": entry.column,
+                    "stock_id": stock_ids[entry.product_id, entry.quantity].pop(),
+                }
+                for entry in missing
+            ],
+        )
+    _mark_inventory_changed(
+        session,
+        {product_id for _, product_id, _ in stock_by_engine.values()}
+        | {entry.product_id for entry in entry_by_engine.values()},
+    )
+
+
+def _mark_inventory_changed(session: SASession, product_ids: Iterable[int]) -> None:
+    session.info.setdefault("inventory_changed", set()).update(product_ids)
+
+
+def refresh_inventory_feed() -> None:
+    bind = Session().get_bind()
+    with bind.connect() as connection:
+        version = connection.scalar(select(InventoryVersion.version)) or 0
+    _sync_inventory_feed(bind, version, None, force=False)
+
+
+def _sync_inventory_feed(
+    bind: SAEngine, version: int, product_ids: set[int] | None, force: bool
+) -> None:
+    def load_committed_quantities(missed_changes: bool) -> dict[int, int]:
+        ids = None if missed_changes else product_ids
+        quantities = dict.fromkeys(ids or (), 0)
+        with bind.connect() as connection:
+            quantities.update(_available_quantities(connection, ids))
+        return quantities
+
+    inventory_feed.sync(version, load_committed_quantities, force=force)
+
+
+@event.listens_for(SASession, "before_commit")
+def _bump_inventory_version(session: SASession) -> None:
+    if not session.info.get("inventory_changed"):
+        return
+    upsert = sqlite_insert(InventoryVersion).values(id=1, version=1)
+    session.info["inventory_version"] = session.execute(
+        upsert.on_conflict_do_update(
+            index_elements=[InventoryVersion.id],
+            set_={"version": InventoryVersion.version + 1},
+        ).returning(InventoryVersion.version)
+    ).scalar_one()
+
+
+@event.listens_for(SASession, "after_commit")
+def _publish_inventory_changes(session: SASession) -> None:
+    product_ids = session.info.pop("inventory_changed", None)
+    version = session.info.pop("inventory_version", None)
+    if not product_ids or version is None:
+        return
+    _sync_inventory_feed(session.get_bind(), version, product_ids, force=True)
+
+
+@event.listens_for(SASession, "after_rollback")
+def _discard_inventory_changes(session: SASession) -> None:
+    session.info.pop("inventory_changed", None)
+    session.info.pop("inventory_version", None)
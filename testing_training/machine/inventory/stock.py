@@ -1,4 +1,4 @@
-from sqlalchemy import ForeignKey
+from sqlalchemy import ForeignKey, Index
 from sqlalchemy.orm import MappedAsDataclass, Mapped, mapped_column
 
 from testing_training.machine.database import Base
@@ -6,7 +6,9 @@ from testing_training.machine.database import Base
 
 class Stock(MappedAsDataclass, Base, unsafe_hash=True):
     __tablename__ = "stocks"
+    __table_args__ = (Index("ix_stocks_product_id_quantity", "product_id", "quantity"),)
 
     id: Mapped[int] = mapped_column(init=False, primary_key=True)
     product_id: Mapped[int] = mapped_column(ForeignKey("products.id"))
     quantity: Mapped[int]
+    reserved: Mapped[int] = mapped_column(default=0, server_default="0")
@@ -0,0 +1,10 @@
+from sqlalchemy.orm import MappedAsDataclass, Mapped, mapped_column
+
+from testing_training.machine.database import Base
+
+
+class InventoryVersion(MappedAsDataclass, Base, unsafe_hash=True):
+    __tablename__ = "inventory_version"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    version: Mapped[int]
@@ -1,5 +1,19 @@
-from testing_training.machine.products.services import add_product, list_products
+from testing_training.machine.products.services import (
+    add_product,
+    get_product,
+    list_products,
+)
+from testing_training.machine.products.catalog import catalog, CatalogEntry
 from testing_training.machine.products.product import Product
-from testing_training.machine.products.money import Money
+from testing_training.machine.products.money import Money, MoneyArray
 
-__all__ = ["add_product", "list_products", "Product", "Money"]
+__all__ = [
+    "add_product",
+    "get_product",
+    "list_products",
+    "catalog",
+    "CatalogEntry",
+    "Product",
+    "Money",
+    "MoneyArray",
+]
@@ -0,0 +1,101 @@
+import threading
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session as SASession, defer
+
+from testing_training.machine.database import Session
+from testing_training.machine.products.money import Money
+from testing_training.machine.products.product import Product
+
+
+@dataclass(frozen=True)
+class CatalogEntry:
+    id: int
+    name: str
+    description: str
+    price: Money
+    image_hash: str
+
+
+@dataclass(frozen=True)
+class _Snapshot:
+    version: int
+    by_id: Mapping[int, CatalogEntry]
+    by_name: Mapping[str, CatalogEntry]
+
+
+class Catalog:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._version = 0
+        self._snapshot: _Snapshot | None = None
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version += 1
+            self._snapshot = None
+
+    def products(self) -> list[CatalogEntry]:
+        return list(self._get_snapshot().by_id.values())
+
+    def by_id(self) -> Mapping[int, CatalogEntry]:
+        return self._get_snapshot().by_id
+
+    def by_name(self) -> Mapping[str, CatalogEntry]:
+        return self._get_snapshot().by_name
+
+    def _get_snapshot(self) -> _Snapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.version == self._version:
+            self.hits += 1
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None:
+                self.hits += 1
+                return self._snapshot
+
+            self.misses += 1
+            entries = [
+                CatalogEntry(
+                    id=product.id,
+                    name=product.name,
+                    description=product.description,
+                    price=product.price,
+                    image_hash=product.image_hash,
+                )
+                for product in Session()
+                .query(Product)
+                .options(defer(Product.image))
+                .order_by(Product.id)
+            ]
+            self._snapshot = _Snapshot(
+                version=self._version,
+                by_id=MappingProxyType({entry.id: entry for entry in entries}),
+                by_name=MappingProxyType({entry.name: entry for entry in entries}),
+            )
+            return self._snapshot
+
+
+catalog = Catalog()
+
+
+def mark_catalog_changed(session: SASession) -> None:
+    session.info["catalog_changed"] = True
+    catalog.invalidate()
+
+
+@event.listens_for(SASession, "after_commit")
+@event.listens_for(SASession, "after_rollback")
+def _invalidate_after_transaction(session: SASession) -> None:
+    if session.info.pop("catalog_changed", False):
+        catalog.invalidate()
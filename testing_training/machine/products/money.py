@@ -1,34 +1,87 @@
+from array import array
+from collections.abc import Iterable, Iterator, Sequence
 from decimal import Decimal
 from enum import StrEnum
 from typing import Self
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
 
 class Currency(StrEnum):
     PLN = "PLN"
     USD = "USD"
 
 
+_CURRENCIES: dict[str, Currency] = {currency.value: currency for currency in Currency}
+
+
 class Money:
+    __slots__ = ("_minor_units", "_currency")
+
+    _minor_units: int
+    _currency: Currency
+
     def __init__(self, amount: Decimal | int | float, currency: Currency | str) -> None:
-        self._currency = Currency(currency)
+        self._currency = _CURRENCIES.get(currency) or Currency(currency)
+
+        if type(amount) is int:
+            if amount < 0:
+                raise ValueError("Amount has to be positive")
+            self._minor_units = amount * 100
+            return
 
         if isinstance(amount, float):
             amount = Decimal(str(amount))
         else:
             amount = Decimal(amount)
 
-        amount = amount.normalize()
-        decimal_tuple = amount.as_tuple()
-        if decimal_tuple.sign:
+        minor_units = amount.scaleb(2)
+        if amount.is_signed():
             raise ValueError("Amount has to be positive")
-        elif -decimal_tuple.exponent > 2:
+        elif minor_units != minor_units.to_integral_value():
             raise ValueError("Amount has to have at most two decimal places")
 
-        self._amount = amount
+        self._minor_units = int(minor_units)
+
+    @classmethod
+    def from_minor_units(cls, minor_units: int, currency: Currency) -> Self:
+        money = object.__new__(cls)
+        money._minor_units = minor_units
+        money._currency = currency
+        return money
+
+    @classmethod
+    def sum_products(cls, prices: Iterable["Money"], quantities: Iterable[int]) -> Self:
+        minor_units = 0
+        currencies = set()
+        for price, quantity in zip(prices, quantities, strict=True):
+            if not isinstance(quantity, int):
+                raise TypeError(
+                    f"can't multiply {cls.__name__} by non-int of type '{type(quantity).__name__}'"
+                )
+            if quantity < 0:
+                raise ValueError("Amount has to be positive")
+            minor_units += price._minor_units * quantity
+            currencies.add(price._currency)
+
+        if not currencies:
+            raise ValueError("cannot sum an empty list of prices")
+        if len(currencies) > 1:
+            raise ValueError(
+                f"cannot add prices in {', '.join(sorted(currencies))} because of different currency"
+            )
+        return cls.from_minor_units(minor_units, currencies.pop())
+
+    @property
+    def minor_units(self) -> int:
+        return self._minor_units
 
     @property
     def amount(self) -> Decimal:
-        return self._amount
+        return Decimal(self._minor_units) / 100
 
     @property
     def currency(self) -> Currency:
@@ -46,29 +99,162 @@ class Money:
     def __eq__(self, other: object) -> bool:
         if not isinstance(other, Money):
             raise TypeError
-        return self.amount == other.amount and self.currency == other.currency
+        return (
+            self._minor_units == other._minor_units
+            and self._currency == other._currency
+        )
 
     def __mul__(self, other: object) -> Self:
         if not isinstance(other, int):
             raise TypeError(
                 f"can't multiply {type(self).__name__} by non-int of type '{type(other).__name__}'"
             )
-        return type(self)(self.amount * other, self.currency)
+        if other < 0:
+            raise ValueError("Amount has to be positive")
+        return self.from_minor_units(self._minor_units * other, self._currency)
 
     def __add__(self, other: object) -> Self:
-        match other:
-            case Money(amount=amount, currency=self.currency):
-                return type(self)(self.amount + amount, self.currency)
-            case Money(currency=_):
+        if isinstance(other, Money):
+            if other._currency != self._currency:
                 raise ValueError(
                     f"cannot add {self} to {other} because of different currency"
                 )
-            case 0:
-                return self
-            case _:
-                raise TypeError(
-                    f"unsupported operand type(s) for +: '{type(self).__name__}' and '{type(other).__name__}'"
-                )
+            return self.from_minor_units(
+                self._minor_units + other._minor_units, self._currency
+            )
+        if other == 0:
+            return self
+        raise TypeError(
+            f"unsupported operand type(s) for +: '{type(self).__name__}' and '{type(other).__name__}'"
+        )
 
     def __radd__(self, other: object) -> Self:
         return self.__add__(other)
+
+
+_CURRENCY_BY_CODE: tuple[Currency, ...] = tuple(Currency)
+_CODE_BY_CURRENCY: dict[Currency, int] = {
+    currency: code for code, currency in enumerate(_CURRENCY_BY_CODE)
+}
+
+
+class MoneyArray:
+    __slots__ = ("_minor_units", "_currency_codes")
+
+    def __init__(
+        self, minor_units: Sequence[int], currency_codes: Sequence[int]
+    ) -> None:
+        if numpy is not None:
+            self._minor_units = numpy.asarray(minor_units, dtype=numpy.int64)
+            self._currency_codes = numpy.asarray(currency_codes, dtype=numpy.int8)
+        else:
+            self._minor_units = array("q", minor_units)
+            self._currency_codes = array("b", currency_codes)
+
+    @classmethod
+    def from_money(
+        cls, values: Iterable[Money], quantities: Iterable[int] | None = None
+    ) -> Self:
+        values = list(values)
+        money_array = cls(
+            [value._minor_units for value in values],
+            [_CODE_BY_CURRENCY[value._currency] for value in values],
+        )
+        if quantities is None:
+            return money_array
+        return money_array * quantities
+
+    def __len__(self) -> int:
+        return len(self._minor_units)
+
+    def __iter__(self) -> Iterator[Money]:
+        for minor_units, code in zip(self._minor_units, self._currency_codes):
+            yield Money.from_minor_units(int(minor_units), _CURRENCY_BY_CODE[code])
+
+    def __mul__(self, quantities: Iterable[int]) -> Self:
+        quantities = array("q", quantities)
+        if len(quantities) != len(self):
+            raise ValueError(
+                f"cannot multiply {len(self)} amounts by {len(quantities)} quantities"
+            )
+        if min(quantities, default=0) < 0:
+            raise ValueError("Amount has to be positive")
+
+        if numpy is not None:
+            minor_units = self._minor_units * numpy.frombuffer(
+                quantities, dtype=numpy.int64
+            )
+        else:
+            minor_units = [
+                units * quantity
+                for units, quantity in zip(self._minor_units, quantities)
+            ]
+        return type(self)(minor_units, self._currency_codes)
+
+    def subtotals(self) -> dict[Currency, Money]:
+        return {
+            _CURRENCY_BY_CODE[code]: Money.from_minor_units(
+                minor_units, _CURRENCY_BY_CODE[code]
+            )
+            for code, minor_units in self._sum_by_currency_code()
+        }
+
+    def total(self) -> Money:
+        subtotals = list(self.subtotals().values())
+        if not subtotals:
+            raise ValueError("cannot total an empty MoneyArray")
+        if len(subtotals) > 1:
+            raise ValueError(
+                f"cannot add {subtotals[0]} to {subtotals[1]} because of different currency"
+            )
+        return subtotals[0]
+
+    def split_commission(self, rate: Decimal) -> tuple[Self, Self]:
+        numerator, denominator = Decimal(rate).as_integer_ratio()
+        if not 0 <= numerator <= denominator:
+            raise ValueError("Commission rate has to be between 0 and 1")
+
+        if numpy is not None:
+            quotient, remainder = numpy.divmod(
+                self._minor_units * numerator, denominator
+            )
+            commissions = quotient + (
+                (2 * remainder > denominator)
+                | ((2 * remainder == denominator) & (quotient % 2 == 1))
+            )
+            payouts = self._minor_units - commissions
+        else:
+            commissions = [
+                _round_half_even(units * numerator, denominator)
+                for units in self._minor_units
+            ]
+            payouts = [
+                units - commission
+                for units, commission in zip(self._minor_units, commissions)
+            ]
+        return (
+            type(self)(payouts, self._currency_codes),
+            type(self)(commissions, self._currency_codes),
+        )
+
+    def _sum_by_currency_code(self) -> list[tuple[int, int]]:
+        if numpy is not None:
+            return [
+                (
+                    int(code),
+                    int(self._minor_units[self._currency_codes == code].sum()),
+                )
+                for code in numpy.unique(self._currency_codes)
+            ]
+
+        sums: dict[int, int] = {}
+        for minor_units, code in zip(self._minor_units, self._currency_codes):
+            sums[code] = sums.get(code, 0) + minor_units
+        return sorted(sums.items())
+
+
+def _round_half_even(dividend: int, divisor: int) -> int:
+    quotient, remainder = divmod(dividend, divisor)
+    if 2 * remainder > divisor or (2 * remainder == divisor and quotient % 2 == 1):
+        return quotient + 1
+    return quotient
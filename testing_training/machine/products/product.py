@@ -1,11 +1,35 @@
+import hashlib
 from decimal import Decimal
 
+from sqlalchemy import Connection, bindparam, select, update
 from sqlalchemy.orm import MappedAsDataclass, Mapped, mapped_column, composite
 
 from testing_training.machine.database import Base
 from testing_training.machine.products.money import Money
 
 
+def hash_image(image: bytes) -> str:
+    return hashlib.sha256(image).hexdigest()
+
+
+def backfill_image_hashes(connection: Connection) -> None:
+    products = Product.__table__
+    rows = connection.execute(
+        select(products.c.id, products.c.image).filter(products.c.image_hash.is_(None))
+    ).all()
+    if not rows:
+        return
+    connection.execute(
+        update(products)
+        .where(products.c.id == bindparam("product_id"))
+        .values(image_hash=bindparam("hash")),
+        [
+            {"product_id": product_id, "hash": hash_image(image)}
+            for product_id, image in rows
+        ],
+    )
+
+
 class Product(MappedAsDataclass, Base, unsafe_hash=True):
     __tablename__ = "products"
 
@@ -16,3 +40,9 @@ class Product(MappedAsDataclass, Base, unsafe_hash=True):
     _currency: Mapped[str] = mapped_column(init=False)
     price: Mapped[Money] = composite("_amount", "_currency")
     image: Mapped[bytes]
+    image_hash: Mapped[str] = mapped_column(
+        init=False, info={"backfill": backfill_image_hashes}
+    )
+
+    def __post_init__(self) -> None:
+        self.image_hash = hash_image(self.image)
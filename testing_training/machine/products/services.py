@@ -1,6 +1,8 @@
 from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import defer
 
 from testing_training.machine.database import Session
+from testing_training.machine.products.catalog import mark_catalog_changed
 from testing_training.machine.products.money import Money
 from testing_training.machine.products.product import Product
 
@@ -18,8 +20,14 @@ def add_product(name: str, description: str, price: Money, image: bytes) -> None
     except IntegrityError as e:
         session.rollback()
         raise DuplicateName from e
+    mark_catalog_changed(session)
 
 
 def list_products() -> list[Product]:
     session = Session()
-    return session.query(Product).all()
+    return session.query(Product).options(defer(Product.image)).all()
+
+
+def get_product(product_id: int) -> Product | None:
+    session = Session()
+    return session.get(Product, product_id, options=[defer(Product.image)])
@@ -2,11 +2,18 @@ from pathlib import Path
 from typing import Annotated
 
 from fastapi import FastAPI, Request, Form
-from fastapi.responses import HTMLResponse
+from fastapi.responses import HTMLResponse, JSONResponse
 from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
 from starlette.responses import RedirectResponse
 
+from testing_training.machine.database import Session
+from testing_training.machine.inventory import (
+    EngineStock,
+    StockReserved,
+    set_stock_on_engines,
+)
+
 app = FastAPI()
 
 TEMPLATES_DIR = Path(__file__).parent / "templates"
@@ -35,3 +42,18 @@ async def update_machine_status(
 ) -> RedirectResponse:
     globals()["MACHINE_STATUS"] = machine_status
     return RedirectResponse("/", status_code=303)
+
+
+@app.put("/stock")
+def restock(entries: list[EngineStock]) -> JSONResponse:
+    session = Session()
+    try:
+        set_stock_on_engines(entries)
+    except StockReserved:
+        session.rollback()
+        return JSONResponse(
+            content={"error": "Stock is reserved by pending orders"},
+            status_code=409,
+        )
+    session.commit()
+    return JSONResponse(content={"restocked_engines": len(entries)})
@@ -9,6 +9,8 @@ PARITY_EVEN = 2
 ACK = b"\x00\x06"
 NACK = b"\x00\x15"
 
+FRAME_LENGTH = 5
+
 
 class SerialException(Exception):
     pass
@@ -30,11 +32,15 @@ class Serial:
         self._timeout = timeout
         self._opened = False
         self._last_payload: None | bytes = None
+        self._pending_responses = 0
+        self._responses_ready_at = 0.0
 
     def write(self, payload: bytes) -> None:
         if not self._opened:
             raise SerialException("Port is not open!")
         self._last_payload = payload
+        self._pending_responses += max(1, len(payload) // FRAME_LENGTH)
+        self._responses_ready_at = time.monotonic() + Serial.TIME_IT_TAKES_TO_RESPOND
 
     def read(self, length: int) -> bytes:
         if length != 2:
@@ -44,10 +50,15 @@ class Serial:
             raise SerialException("Port is not open!")
 
         if Serial._TIMEOUT:
+            self._pending_responses = 0
             time.sleep(self._timeout)
             raise SerialTimeoutException("Timeout!")
 
-        time.sleep(Serial.TIME_IT_TAKES_TO_RESPOND)
+        if self._pending_responses:
+            time.sleep(max(0.0, self._responses_ready_at - time.monotonic()))
+            self._pending_responses -= 1
+        else:
+            time.sleep(Serial.TIME_IT_TAKES_TO_RESPOND)
         if Serial._SIMULATE_ERROR:
             return NACK
         else:
@@ -62,6 +73,7 @@ class Serial:
         if not self._opened:
             raise SerialException("Port is not open!")
         self._opened = False
+        self._pending_responses = 0
 
     _TIMEOUT = False
     _SIMULATE_ERROR = False
@@ -1,10 +1,14 @@
 import asyncio
+import logging
 from typing import Literal
 
+import httpx
 from fastapi import FastAPI, BackgroundTasks
 from fastapi.responses import JSONResponse
 from pydantic import BaseModel, HttpUrl
 
+logger = logging.getLogger(__name__)
+
 app = FastAPI()
 
 _FAIL_MODE = False
@@ -35,6 +39,15 @@ class Payload(BaseModel):
 async def send_notification(order_id: str, url: str) -> None:
     await asyncio.sleep(1)
     _SUCCESSFUL_ORDER_IDS.add(order_id)
+    try:
+        response = await asyncio.to_thread(
+            httpx.post, url, json={"order_id": order_id, "status": "DONE"}
+        )
+    except httpx.HTTPError:
+        logger.error(f"Failed to send notification for order {order_id}")
+        return
+    if not response.is_success:
+        logger.error(f"Failed to send notification for order {order_id}")
 
 
 @app.post("/v1/order")
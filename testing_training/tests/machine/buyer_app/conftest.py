@@ -7,7 +7,9 @@ from multiprocessing import Process
 
 from sqlalchemy import create_engine
 
+from testing_training.machine.buyer_app.payment_deadlines import payment_deadlines
 from testing_training.machine.database import Base, Session
+from testing_training.machine.products import catalog
 
 
 @pytest.fixture(autouse=True)
@@ -19,6 +21,8 @@ def clean_db() -> None:
     Base.metadata.drop_all(engine)
     Base.metadata.create_all(engine)
     Session.configure(bind=engine)
+    catalog.invalidate()
+    payment_deadlines.clear()
 
 
 @pytest.fixture(scope="session", autouse=True)
@@ -0,0 +1,385 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+from datetime import datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from testing_training.machine.buyer_app.app import app, inventory_stream
+from testing_training.machine.buyer_app.idempotency import placed_orders
+from testing_training.machine.buyer_app.order import Order
+from testing_training.machine.buyer_app.order_events import (
+    OrderStatusChanged,
+    order_events,
+)
+from testing_training.machine.buyer_app.scheduler import scheduler
+from testing_training.machine.buyer_app.terminal_client import terminal_client
+from testing_training.machine.buyer_app.vending import Vending
+from testing_training.machine.database import Session
+from testing_training.machine.inventory import (
+    inventory_feed,
+    reserve_stock,
+    set_stock_on_engine,
+)
+from testing_training.machine.products import add_product, Money, list_products
+from testing_training.machine.products.money import Currency
+from testing_training.tests.machine.buyer_app import tools
+from testing_training.tests.machine.buyer_app.test_vending import (
+    terminal_app_is_running,
+    wait_until,
+)
+
+
+def test_products_are_listed_without_images() -> None:
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    Session().commit()
+
+    with TestClient(app) as client:
+        response = client.get("/products")
+
+    assert response.status_code == 200
+    [product] = response.json()
+    assert "image" not in product
+    assert product["image_url"] == (
+        f"/products/{product['id']}/image?v={product['image_hash']}"
+    )
+
+
+def test_product_image_is_served_with_etag() -> None:
+    add_product(
+        name="Dress",
+        description="Nice dress",
+        price=Money(10, Currency.PLN),
+        image=b"image",
+    )
+    Session().commit()
+    product_id = list_products()[0].id
+
+    with TestClient(app) as client:
+        response = client.get(f"/products/{product_id}/image")
+        etag = response.headers["etag"]
+        cached_response = client.get(
+            f"/products/{product_id}/image", headers={"If-None-Match": etag}
+        )
+
+    assert response.status_code == 200
+    assert response.content == b"image"
+    assert response.headers["content-type"] == "image/webp"
+    assert cached_response.status_code == 304
+    assert cached_response.content == b""
+
+
+def test_image_of_not_existing_product_is_not_found() -> None:
+    with TestClient(app) as client:
+        response = client.get("/products/123/image")
+
+    assert response.status_code == 404
+
+
+def test_order_exceeding_stock_is_rejected() -> None:
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    product_id = list_products()[0].id
+    set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=1)
+    Session().commit()
+
+    with TestClient(app) as client:
+        response = client.post("/order", json={"items": {product_id: 2}})
+
+    assert response.status_code == 409
+    assert response.json() == {"error": "Not enough stock"}
+
+
+def test_payment_notification_dispenses_the_order() -> None:
+    wait_until(terminal_app_is_running)
+    tools.restore_engine_state()
+    tools.restore_terminal()
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    product_id = list_products()[0].id
+    set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=1)
+    order_id = _add_awaiting_order(product_id)
+    scheduler.submit(
+        terminal_client.start_payment(order_id, Money(9, Currency.PLN))
+    ).result()
+    wait_until(
+        lambda: (
+            scheduler.submit(terminal_client.get_payment_status(order_id)).result()
+            == "DONE"
+        )
+    )
+
+    with TestClient(app) as client:
+        response = client.post(
+            "/payment/notifications", json={"order_id": order_id, "status": "DONE"}
+        )
+
+        def order_is_done() -> bool:
+            return Vending().get_order(order_id).status == "DONE"
+
+        wait_until(order_is_done, timeout=5)
+
+    assert response.status_code == 200
+
+
+def test_unconfirmed_payment_notification_is_ignored() -> None:
+    wait_until(terminal_app_is_running)
+    tools.restore_terminal()
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    product_id = list_products()[0].id
+    set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=1)
+    order_id = _add_awaiting_order(product_id, order_id=999_998)
+
+    Vending.payment_received(order_id).result()
+
+    assert Vending().get_order(order_id).status == "AWAITING_PAYMENT"
+
+
+def _add_awaiting_order(product_id: int, order_id: int | None = None) -> int:
+    session = Session()
+    order = Order(
+        created_at=datetime.now(),
+        status="AWAITING_PAYMENT",
+        total=Money(9, Currency.PLN),
+        items={product_id: 1},
+    )
+    if order_id is not None:
+        order.id = order_id
+    session.add(order)
+    session.flush()
+    reserve_stock(order.id, {product_id: 1})
+    session.commit()
+    return order.id
+
+
+def test_order_status_changes_are_streamed_until_final_status() -> None:
+    session = Session()
+    order = Order(
+        created_at=datetime.now(),
+        status="AWAITING_PAYMENT",
+        total=Money(9, Currency.PLN),
+        items={},
+    )
+    session.add(order)
+    session.commit()
+    order_id = order.id
+
+    def publish_when_subscribed() -> None:
+        wait_until(lambda: len(order_events._subscriptions) > 0)
+        order_events.publish(OrderStatusChanged(order_id, "DISPENSING"))
+        order_events.publish(OrderStatusChanged(order_id, "DONE"))
+
+    publisher = threading.Thread(target=publish_when_subscribed)
+    publisher.start()
+    with TestClient(app) as client:
+        response = client.get(f"/order/{order_id}/events")
+    publisher.join()
+
+    data_lines = [
+        line for line in response.text.splitlines() if line.startswith("data: ")
+    ]
+    statuses = [json.loads(line[len("data: ") :])["status"] for line in data_lines]
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert statuses == ["AWAITING_PAYMENT", "DISPENSING", "DONE"]
+
+
+def test_inventory_stream_sends_snapshot_then_changes() -> None:
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    product_id = list_products()[0].id
+    set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=3)
+    Session().commit()
+
+    async def read_two_events() -> list[str]:
+        response = await inventory_stream()
+        events = response.body_iterator
+        snapshot = await anext(events)
+        set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=1)
+        Session().commit()
+        change = await anext(events)
+        await events.aclose()
+        return [snapshot, change]
+
+    snapshot, change = asyncio.run(read_two_events())
+
+    assert "event: snapshot" in snapshot
+    assert json.loads(snapshot.split("data: ")[1])["inventory"] == {str(product_id): 3}
+    change_data = json.loads(change.split("data: ")[1])
+    assert "event: change" in change
+    assert change_data["changes"] == {str(product_id): 1}
+    assert change_data["version"] > json.loads(snapshot.split("data: ")[1])["version"]
+
+
+def test_unchanged_products_are_not_modified() -> None:
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    Session().commit()
+
+    with TestClient(app) as client:
+        response = client.get("/products")
+        etag = response.headers["etag"]
+        cached_response = client.get("/products", headers={"If-None-Match": etag})
+        add_product(
+            name="Dress",
+            description="Nice dress",
+            price=Money(10, Currency.PLN),
+            image=b"image",
+        )
+        Session().commit()
+        changed_response = client.get("/products", headers={"If-None-Match": etag})
+
+    assert cached_response.status_code == 304
+    assert cached_response.content == b""
+    assert changed_response.status_code == 200
+    assert len(changed_response.json()) == 2
+    assert changed_response.headers["etag"] != etag
+
+
+def test_unchanged_inventory_is_not_modified() -> None:
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    product_id = list_products()[0].id
+    set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=3)
+    Session().commit()
+
+    with TestClient(app) as client:
+        response = client.get("/inventory")
+        etag = response.headers["etag"]
+        cached_response = client.get("/inventory", headers={"If-None-Match": etag})
+        set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=1)
+        Session().commit()
+        changed_response = client.get("/inventory", headers={"If-None-Match": etag})
+
+    assert response.json() == {str(product_id): 3}
+    assert cached_response.status_code == 304
+    assert changed_response.status_code == 200
+    assert changed_response.json() == {str(product_id): 1}
+
+
+def test_inventory_restocked_by_another_process_is_modified() -> None:
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    product_id = list_products()[0].id
+    set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=3)
+    Session().commit()
+
+    with TestClient(app) as client:
+        response = client.get("/inventory")
+        etag = response.headers["etag"]
+        version = inventory_feed.version
+        _restock_in_another_process(product_id, quantity=5)
+        changed_response = client.get("/inventory", headers={"If-None-Match": etag})
+
+    assert changed_response.status_code == 200
+    assert changed_response.json() == {str(product_id): 5}
+    [change] = inventory_feed.changes_since(version)
+    assert dict(change.quantities) == {product_id: 5}
+
+
+def _restock_in_another_process(product_id: int, quantity: int) -> None:
+    script = (
+        "from testing_training.machine.database import Session\n"
+        "from testing_training.machine.inventory import set_stock_on_engine\n"
+        "import testing_training.machine.products\n"
+        f"set_stock_on_engine(row=1, column=1, product_id={product_id}, "
+        f"quantity={quantity})\n"
+        "Session().commit()\n"
+    )
+    subprocess.run(
+        [sys.executable, "-c", script],
+        env={**os.environ, "SQLITE_JOURNAL_MODE": "DELETE"},
+        check=True,
+    )
+
+
+def test_retried_order_with_same_idempotency_key_is_placed_once() -> None:
+    wait_until(terminal_app_is_running)
+    tools.restore_terminal()
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    product_id = list_products()[0].id
+    set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=2)
+    Session().commit()
+    payload = {"items": {product_id: 1}, "idempotency_key": "tablet-retry-1"}
+
+    with TestClient(app) as client:
+        first = client.post("/order", json=payload)
+        replayed = client.post("/order", json=payload)
+        placed_orders.clear()
+        replayed_from_db = client.post("/order", json=payload)
+
+    assert first.status_code == 200
+    assert replayed.json() == first.json()
+    assert replayed_from_db.json()["order_id"] == first.json()["order_id"]
+    assert Session().scalar(select(func.count()).select_from(Order)) == 1
+
+
+def test_idempotency_key_reused_for_different_items_is_rejected() -> None:
+    wait_until(terminal_app_is_running)
+    tools.restore_terminal()
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    product_id = list_products()[0].id
+    set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=3)
+    Session().commit()
+
+    with TestClient(app) as client:
+        first = client.post(
+            "/order",
+            json={"items": {product_id: 1}, "idempotency_key": "tablet-reuse-1"},
+        )
+        different = {"items": {product_id: 2}, "idempotency_key": "tablet-reuse-1"}
+        rejected = client.post("/order", json=different)
+        placed_orders.clear()
+        rejected_from_db = client.post("/order", json=different)
+
+    assert first.status_code == 200
+    assert rejected.status_code == 422
+    assert rejected_from_db.status_code == 422
+    assert Session().scalar(select(func.count()).select_from(Order)) == 1
@@ -0,0 +1,185 @@
+from datetime import datetime
+from unittest.mock import Mock, patch
+
+import pytest
+from sqlalchemy import func, select, update
+
+from testing_training.machine.buyer_app import dispense_queue
+from testing_training.machine.buyer_app.dispense_queue import (
+    DispenseJob,
+    DispenseWorker,
+    dispense,
+)
+from testing_training.machine.buyer_app.engines_controller import UnexpectedResponse
+from testing_training.machine.buyer_app.order import Order
+from testing_training.machine.buyer_app.order_events import OrderStatusChanged
+from testing_training.machine.database import Session
+from testing_training.machine.inventory import (
+    Entry,
+    get_inventory,
+    reserve_stock,
+    set_stock_on_engine,
+)
+from testing_training.machine.inventory.stock import Stock
+from testing_training.machine.products import add_product, Money, list_products
+from testing_training.machine.products.money import Currency
+from testing_training.tests.machine.buyer_app.test_vending import wait_until
+
+
+def _dispensing_order(product_id: int, quantity: int) -> int:
+    session = Session()
+    order = Order(
+        created_at=datetime.now(),
+        status="DISPENSING",
+        total=Money(9, Currency.PLN) * quantity,
+        items={product_id: quantity},
+    )
+    session.add(order)
+    session.flush()
+    reserve_stock(order.id, {product_id: quantity})
+    return order.id
+
+
+def _status(order_id: int) -> str:
+    session = Session()
+    session.rollback()
+    return session.get(Order, order_id).status
+
+
+def test_worker_resumes_queued_jobs_and_fails_interrupted_ones() -> None:
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    product_id = list_products()[0].id
+    set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=5)
+    queued_id = _dispensing_order(product_id, 2)
+    interrupted_id = _dispensing_order(product_id, 1)
+    session = Session()
+    session.add(DispenseJob(order_id=queued_id, enqueued_at=datetime.now()))
+    session.add(
+        DispenseJob(
+            order_id=interrupted_id,
+            enqueued_at=datetime.now(),
+            started_at=datetime.now(),
+        )
+    )
+    session.commit()
+    engines_controller = Mock()
+    engines_controller.move_engines.side_effect = lambda plan: [True] * len(plan)
+
+    worker = DispenseWorker(engines_controller_factory=lambda: engines_controller)
+    worker.start()
+    try:
+        wait_until(lambda: _status(queued_id) == "DONE", timeout=5)
+        wait_until(lambda: _status(interrupted_id) == "DISPENSING_ERROR", timeout=5)
+    finally:
+        worker.stop()
+
+    engines_controller.move_engines.assert_called_once_with([(1, 1), (1, 1)])
+    engines_controller.close.assert_called_once()
+    assert get_inventory() == [Entry(product_id=product_id, quantity=3)]
+    assert Session().scalar(select(func.count()).select_from(DispenseJob)) == 0
+
+
+def test_failed_dispense_keeps_stock_and_ends_in_error() -> None:
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    product_id = list_products()[0].id
+    set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=2)
+    order_id = _dispensing_order(product_id, 1)
+    Session().add(DispenseJob(order_id=order_id, enqueued_at=datetime.now()))
+    Session().commit()
+    engines_controller = Mock()
+    engines_controller.move_engines.return_value = [False]
+
+    worker = DispenseWorker(engines_controller_factory=lambda: engines_controller)
+    worker.enqueue(order_id)
+    try:
+        wait_until(lambda: _status(order_id) == "DISPENSING_ERROR", timeout=5)
+    finally:
+        worker.stop()
+
+    assert get_inventory() == [Entry(product_id=product_id, quantity=2)]
+
+
+def test_worker_retries_opening_engines_controller(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(dispense_queue, "OPEN_RETRY_INTERVAL", 0.01)
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    product_id = list_products()[0].id
+    set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=2)
+    order_id = _dispensing_order(product_id, 1)
+    Session().add(DispenseJob(order_id=order_id, enqueued_at=datetime.now()))
+    Session().commit()
+    engines_controller = Mock()
+    engines_controller.open.side_effect = [OSError("Port is busy"), None]
+    engines_controller.move_engines.return_value = [True]
+
+    worker = DispenseWorker(engines_controller_factory=lambda: engines_controller)
+    worker.enqueue(order_id)
+    try:
+        wait_until(lambda: _status(order_id) == "DONE", timeout=5)
+    finally:
+        worker.stop()
+
+    assert engines_controller.open.call_count == 2
+    assert get_inventory() == [Entry(product_id=product_id, quantity=1)]
+
+
+def test_unexpected_response_lowers_stock_for_dispensed_units() -> None:
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    product_id = list_products()[0].id
+    set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=3)
+    order_id = _dispensing_order(product_id, 2)
+    Session().add(DispenseJob(order_id=order_id, enqueued_at=datetime.now()))
+    Session().commit()
+    engines_controller = Mock()
+    engines_controller.move_engines.side_effect = UnexpectedResponse([True, False])
+
+    dispense(engines_controller, order_id)
+
+    assert _status(order_id) == "DISPENSING_ERROR"
+    assert get_inventory() == [Entry(product_id=product_id, quantity=2)]
+
+
+def test_order_ends_in_error_when_stock_cannot_be_lowered() -> None:
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    product_id = list_products()[0].id
+    set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=1)
+    order_id = _dispensing_order(product_id, 1)
+    session = Session()
+    session.add(DispenseJob(order_id=order_id, enqueued_at=datetime.now()))
+    session.execute(update(Stock).values(quantity=0))
+    session.commit()
+    engines_controller = Mock()
+    engines_controller.move_engines.return_value = [True]
+
+    with patch.object(dispense_queue.order_events, "publish") as publish:
+        dispense(engines_controller, order_id)
+
+    assert _status(order_id) == "DISPENSING_ERROR"
+    publish.assert_called_once_with(OrderStatusChanged(order_id, "DISPENSING_ERROR"))
+    assert Session().scalar(select(func.count()).select_from(DispenseJob)) == 0
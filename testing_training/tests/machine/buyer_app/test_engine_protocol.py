@@ -0,0 +1,34 @@
+import pytest
+
+from testing_training.machine.buyer_app.engine_protocol import (
+    decode_response,
+    encode_drive,
+    DriveFrames,
+)
+from testing_training.machine.config import MachineSettings
+from testing_training.myserial import ACK, NACK
+
+
+def test_encodes_drive_frame_with_checksum() -> None:
+    assert encode_drive(2, 1) == bytes([0x02, 0x13, 21, 0x01, 0x2B])
+    assert encode_drive(2, 1, steps=3) == bytes([0x02, 0x13, 21, 0x03, 0x2D])
+
+
+def test_batch_uses_precomputed_and_encodes_other_frames() -> None:
+    frames = DriveFrames(MachineSettings(SHELVES=2, ENGINES=2))
+
+    payload = frames.encode([(1, 1), (7, 3)])
+
+    assert payload == encode_drive(1, 1) + encode_drive(7, 3)
+    assert frames.encode([(1, 2)], steps=2) == encode_drive(1, 2, steps=2)
+
+
+def test_rejects_engine_that_does_not_fit_in_frame() -> None:
+    with pytest.raises(ValueError):
+        encode_drive(26, 1)
+
+
+def test_decodes_responses() -> None:
+    assert decode_response(ACK) is True
+    assert decode_response(NACK) is False
+    assert decode_response(b"\x00\x00") is None
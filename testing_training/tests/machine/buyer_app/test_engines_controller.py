@@ -1,5 +1,13 @@
 from unittest.mock import Mock
-from testing_training.machine.buyer_app.engines_controller import EnginesController
+
+import pytest
+
+from testing_training.myserial import ACK, SerialException, SerialTimeoutException
+from testing_training.machine.buyer_app.engines_controller import (
+    EnginesController,
+    UnexpectedResponse,
+)
+from testing_training.tests.machine.buyer_app import tools
 
 
 def test_can_be_opened_and_closed():
@@ -11,4 +19,82 @@ def test_can_be_opened_and_closed():
     engines_controller.close()
 
     mock.open.assert_called_once()
-    mock.closed.assert_called_once()
+    mock.close.assert_called_once()
+
+
+def test_reconnects_when_port_was_closed():
+    tools.restore_engine_state()
+    engines_controller = EnginesController()
+    engines_controller.open()
+    engines_controller._serial.close()
+
+    result = engines_controller.move_engine(1, 1)
+
+    assert result is True
+    engines_controller.close()
+
+
+def test_moves_many_engines_with_a_single_write():
+    tools.restore_engine_state()
+    engines_controller = EnginesController()
+    mock = Mock()
+    mock.read.return_value = ACK
+    engines_controller._serial = mock
+
+    results = engines_controller.move_engines([(1, 1), (1, 2), (2, 1)])
+
+    assert results == [True, True, True]
+    mock.write.assert_called_once_with(
+        bytes([0x02, 0x13, 11, 0x01, 0x21])
+        + bytes([0x02, 0x13, 12, 0x01, 0x22])
+        + bytes([0x02, 0x13, 21, 0x01, 0x2B])
+    )
+    assert mock.read.call_count == 3
+
+
+def test_reports_result_for_every_engine():
+    tools.simulate_engine_error()
+    engines_controller = EnginesController()
+    engines_controller.open()
+
+    results = engines_controller.move_engines([(1, 1), (1, 2)])
+
+    assert results == [False, False]
+    engines_controller.close()
+    tools.restore_engine_state()
+
+
+def test_does_not_resend_frames_when_reading_responses_fails():
+    engines_controller = EnginesController()
+    mock = Mock()
+    mock.read.side_effect = [ACK, SerialException("Port is not open!")]
+    engines_controller._serial = mock
+
+    results = engines_controller.move_engines([(1, 1), (1, 2), (2, 1)])
+
+    assert results == [True, False, False]
+    mock.write.assert_called_once()
+
+
+def test_keeps_results_read_before_a_timeout():
+    engines_controller = EnginesController()
+    mock = Mock()
+    mock.read.side_effect = [ACK, SerialTimeoutException("Timeout!")]
+    engines_controller._serial = mock
+
+    results = engines_controller.move_engines([(1, 1), (1, 2), (2, 1)])
+
+    assert results == [True, False, False]
+    mock.write.assert_called_once()
+
+
+def test_unexpected_response_carries_results_of_other_engines():
+    engines_controller = EnginesController()
+    mock = Mock()
+    mock.read.side_effect = [ACK, b"\xff\xff", ACK]
+    engines_controller._serial = mock
+
+    with pytest.raises(UnexpectedResponse) as error:
+        engines_controller.move_engines([(1, 1), (1, 2), (2, 1)])
+
+    assert error.value.results == [True, False, True]
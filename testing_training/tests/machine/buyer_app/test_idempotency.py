@@ -0,0 +1,32 @@
+import pytest
+
+from testing_training.machine.buyer_app.idempotency import (
+    IdempotencyCache,
+    IdempotencyKeyReused,
+    request_hash,
+)
+
+
+def test_evicts_least_recently_used_response() -> None:
+    cache = IdempotencyCache(max_size=2)
+    cache.put("a", "hash-a", {"order_id": 1})
+    cache.put("b", "hash-b", {"order_id": 2})
+    cache.get("a", "hash-a")
+
+    cache.put("c", "hash-c", {"order_id": 3})
+
+    assert cache.get("a", "hash-a") == {"order_id": 1}
+    assert cache.get("b", "hash-b") is None
+    assert cache.get("c", "hash-c") == {"order_id": 3}
+
+
+def test_rejects_key_reused_for_different_request() -> None:
+    cache = IdempotencyCache(max_size=2)
+    cache.put("a", request_hash({1: 1}), {"order_id": 1})
+
+    with pytest.raises(IdempotencyKeyReused):
+        cache.get("a", request_hash({1: 2}))
+
+
+def test_request_hash_does_not_depend_on_item_order() -> None:
+    assert request_hash({1: 1, 2: 3}) == request_hash({2: 3, 1: 1})
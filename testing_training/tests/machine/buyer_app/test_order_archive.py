@@ -0,0 +1,85 @@
+from datetime import datetime, timedelta
+
+from sqlalchemy import func, select
+
+from testing_training.machine.buyer_app.order import Order
+from testing_training.machine.buyer_app.order_archive import (
+    ArchivedOrder,
+    archive_orders,
+    find_order,
+)
+from testing_training.machine.database import Session
+from testing_training.machine.products import Money
+from testing_training.machine.products.money import Currency
+
+
+def _add_order(status: str, created_at: datetime) -> int:
+    session = Session()
+    order = Order(
+        created_at=created_at,
+        status=status,
+        total=Money(9, Currency.PLN),
+        items={1: 1},
+    )
+    session.add(order)
+    session.commit()
+    return order.id
+
+
+def test_old_finished_orders_are_moved_to_archive_in_batches() -> None:
+    now = datetime.now()
+    old = now - timedelta(days=60)
+    old_finished_ids = [
+        _add_order(status, old)
+        for status in ("DONE", "PAYMENT_TIMEOUT", "PAYMENT_FAILED", "DISPENSING_ERROR")
+    ]
+    old_pending_id = _add_order("DISPENSING", old)
+    recent_id = _add_order("DONE", now)
+
+    archived = archive_orders(before=now - timedelta(days=30), batch_size=3)
+
+    session = Session()
+    session.rollback()
+    assert archived == 4
+    assert session.scalars(select(Order.id).order_by(Order.id)).all() == [
+        old_pending_id,
+        recent_id,
+    ]
+    assert (
+        session.scalars(select(ArchivedOrder.id).order_by(ArchivedOrder.id)).all()
+        == old_finished_ids
+    )
+
+
+def test_archived_orders_are_still_found() -> None:
+    order_id = _add_order("DONE", datetime.now() - timedelta(days=60))
+    archive_orders(before=datetime.now(), batch_size=10)
+
+    session = Session()
+    session.rollback()
+    order = find_order(session, order_id)
+
+    assert isinstance(order, ArchivedOrder)
+    assert order.status == "DONE"
+    assert order.total == Money(9, Currency.PLN)
+    assert order.items == {"1": 1}
+    assert session.scalar(select(func.count()).select_from(Order)) == 0
+
+
+def test_order_ids_are_not_reused_after_archiving() -> None:
+    archived_id = _add_order("DONE", datetime.now() - timedelta(days=60))
+    archive_orders(before=datetime.now(), batch_size=10)
+
+    order_id = _add_order("DONE", datetime.now() - timedelta(days=60))
+    archived = archive_orders(before=datetime.now(), batch_size=10)
+
+    session = Session()
+    session.rollback()
+    assert order_id > archived_id
+    assert archived == 1
+    assert session.scalars(
+        select(ArchivedOrder.id).order_by(ArchivedOrder.id)
+    ).all() == [
+        archived_id,
+        order_id,
+    ]
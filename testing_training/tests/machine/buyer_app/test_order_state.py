@@ -0,0 +1,38 @@
+from datetime import datetime
+from decimal import Decimal
+
+import pytest
+
+from testing_training.machine.buyer_app.order import Order
+from testing_training.machine.buyer_app.order_state import (
+    IllegalTransition,
+    transition,
+)
+from testing_training.machine.database import Session
+from testing_training.machine.products import Money
+from testing_training.machine.products.money import Currency
+
+
+def test_only_first_of_competing_transitions_wins() -> None:
+    session = Session()
+    order = Order(
+        created_at=datetime.now(),
+        status="AWAITING_PAYMENT",
+        total=Money(Decimal("1"), Currency.PLN),
+        items={},
+    )
+    session.add(order)
+    session.commit()
+
+    dispensing = transition(session, order.id, "AWAITING_PAYMENT", "DISPENSING")
+    timed_out = transition(session, order.id, "AWAITING_PAYMENT", "PAYMENT_TIMEOUT")
+    session.commit()
+
+    assert dispensing is True
+    assert timed_out is False
+    assert order.status == "DISPENSING"
+
+
+def test_rejects_transition_missing_from_state_machine() -> None:
+    with pytest.raises(IllegalTransition):
+        transition(Session(), 1, "DONE", "DISPENSING")
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+from decimal import Decimal
+
+from testing_training.machine.buyer_app.order import Order
+from testing_training.machine.buyer_app.payment_deadlines import (
+    PaymentDeadlines,
+    expire_orders,
+)
+from testing_training.machine.database import Session
+from testing_training.machine.products import Money
+from testing_training.machine.products.money import Currency
+
+
+def test_returns_only_orders_past_their_deadline() -> None:
+    deadlines = PaymentDeadlines(
+        timeout=timedelta(seconds=5), tick=timedelta(seconds=0.25)
+    )
+    now = datetime(2024, 1, 1, 12, 0, 0)
+    deadlines.add(1, now - timedelta(seconds=6))
+    deadlines.add(2, now)
+    deadlines.add(3, now - timedelta(seconds=10))
+
+    assert deadlines.pop_due(now) == [3, 1]
+    assert deadlines.pop_due(now) == []
+    assert deadlines.pop_due(now + timedelta(seconds=5)) == [2]
+
+
+def test_rebuilds_deadlines_of_orders_awaiting_payment() -> None:
+    created_at = datetime(2024, 1, 1, 12, 0, 0)
+    session = Session()
+    awaiting = _order(created_at, "AWAITING_PAYMENT")
+    done = _order(created_at, "DONE")
+    session.add_all([awaiting, done])
+    session.commit()
+    awaiting_id = awaiting.id
+    deadlines = PaymentDeadlines(
+        timeout=timedelta(seconds=5), tick=timedelta(seconds=0.25)
+    )
+
+    deadlines.rebuild()
+
+    assert deadlines.pop_due(created_at + timedelta(seconds=5)) == [awaiting_id]
+
+
+def test_expires_only_orders_still_awaiting_payment() -> None:
+    created_at = datetime(2024, 1, 1, 12, 0, 0)
+    session = Session()
+    awaiting = _order(created_at, "AWAITING_PAYMENT")
+    dispensing = _order(created_at, "DISPENSING")
+    session.add_all([awaiting, dispensing])
+    session.commit()
+    awaiting_id, dispensing_id = awaiting.id, dispensing.id
+
+    expired = expire_orders([awaiting_id, dispensing_id])
+
+    assert expired == [awaiting_id]
+    session = Session()
+    assert session.get(Order, awaiting_id).status == "PAYMENT_TIMEOUT"
+    assert session.get(Order, dispensing_id).status == "DISPENSING"
+
+
+def _order(created_at: datetime, status: str) -> Order:
+    return Order(
+        created_at=created_at,
+        status=status,
+        total=Money(Decimal("1"), Currency.PLN),
+        items={},
+    )
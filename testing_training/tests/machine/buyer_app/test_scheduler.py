@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+from testing_training.machine.buyer_app.scheduler import Scheduler
+
+
+def test_runs_submitted_coroutines_concurrently_on_one_thread() -> None:
+    scheduler = Scheduler()
+    thread_names = set()
+
+    async def wait() -> int:
+        await asyncio.sleep(0.1)
+        thread_names.add(threading.current_thread().name)
+        return 1
+
+    try:
+        futures = [scheduler.submit(wait()) for _ in range(1000)]
+        results = [future.result(timeout=2) for future in futures]
+    finally:
+        scheduler.stop()
+
+    assert sum(results) == 1000
+    assert thread_names == {"scheduler"}
+
+
+def test_can_be_restarted_after_stop() -> None:
+    scheduler = Scheduler()
+
+    async def answer() -> int:
+        return 42
+
+    scheduler.start()
+    scheduler.stop()
+
+    try:
+        assert scheduler.submit(answer()).result(timeout=1) == 42
+    finally:
+        scheduler.stop()
+
+
+def test_runs_shutdown_hooks_on_its_thread_every_time_it_stops() -> None:
+    scheduler = Scheduler()
+    thread_names = []
+
+    async def close() -> None:
+        thread_names.append(threading.current_thread().name)
+
+    scheduler.run_on_shutdown(close)
+    scheduler.start()
+    scheduler.stop()
+    scheduler.start()
+    scheduler.stop()
+
+    assert thread_names == ["scheduler", "scheduler"]
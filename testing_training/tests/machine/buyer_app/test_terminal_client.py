@@ -0,0 +1,31 @@
+import asyncio
+
+from testing_training.machine.buyer_app.terminal_client import TerminalClient
+from testing_training.machine.config import MachineSettings
+from testing_training.tests.machine.buyer_app import tools
+from testing_training.tests.machine.buyer_app.test_vending import (
+    terminal_app_is_running,
+    wait_until,
+)
+
+
+def test_reuses_connection_between_requests() -> None:
+    wait_until(terminal_app_is_running)
+    tools.restore_terminal()
+    terminal_client = TerminalClient(MachineSettings())
+
+    async def check_status_twice() -> list[str]:
+        try:
+            return [
+                await terminal_client.get_payment_status(order_id=999_999),
+                await terminal_client.get_payment_status(order_id=999_999),
+            ]
+        finally:
+            await terminal_client.aclose()
+
+    statuses = asyncio.run(check_status_twice())
+
+    assert statuses == ["ACCEPTED", "ACCEPTED"]
+    assert terminal_client.requests == 2
+    assert terminal_client.connections_opened == 1
+    assert terminal_client.connections_reused == 1
@@ -0,0 +1,59 @@
+import threading
+
+from testing_training.machine.inventory.changes import InventoryFeed
+
+
+def test_changes_since_known_version_are_replayed() -> None:
+    feed = InventoryFeed(history=10)
+    feed.publish({1: 5})
+    feed.publish({2: 3})
+    feed.publish({1: 4})
+
+    changes = feed.changes_since(1)
+
+    assert [change.version for change in changes] == [2, 3]
+    assert [dict(change.quantities) for change in changes] == [{2: 3}, {1: 4}]
+
+
+def test_current_version_has_no_changes() -> None:
+    feed = InventoryFeed(history=10)
+    feed.publish({1: 5})
+
+    assert feed.changes_since(1) == []
+
+
+def test_versions_outside_history_require_snapshot() -> None:
+    feed = InventoryFeed(history=2)
+    for quantity in range(4):
+        feed.publish({1: quantity})
+
+    assert feed.changes_since(1) is None
+    assert feed.changes_since(5) is None
+
+
+def test_quantities_are_loaded_in_version_order() -> None:
+    feed = InventoryFeed(history=10)
+    loading = threading.Event()
+    release = threading.Event()
+
+    def load_slowly() -> dict[int, int]:
+        loading.set()
+        release.wait(timeout=5)
+        return {1: 4}
+
+    first = threading.Thread(target=feed.publish_loaded, args=(load_slowly,))
+    first.start()
+    loading.wait(timeout=5)
+    second = threading.Thread(target=feed.publish_loaded, args=(lambda: {1: 3},))
+    second.start()
+    second.join(timeout=0.1)
+    waited = second.is_alive()
+    release.set()
+    first.join()
+    second.join()
+
+    assert waited
+    assert [dict(change.quantities) for change in feed.changes_since(0)] == [
+        {1: 4},
+        {1: 3},
+    ]
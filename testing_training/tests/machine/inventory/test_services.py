@@ -1,12 +1,27 @@
-from sqlalchemy import create_engine
+import pytest
+from sqlalchemy import create_engine, event, func, select
 
 from testing_training.machine.database import Base, Session
+from testing_training.machine.inventory.changes import inventory_feed
 from testing_training.machine.inventory.engine import Engine
 from testing_training.machine.inventory.stock import Stock
 from testing_training.machine.products.money import Currency, Money
 from testing_training.machine.products.product import Product
 
-from testing_training.machine.inventory.services import get_inventory, Entry
+from testing_training.machine.inventory.services import (
+    get_engine_with_product,
+    get_inventory,
+    plan_dispense,
+    release_reservation,
+    reserve_stock,
+    lower_stock_on_engine,
+    set_stock_on_engine,
+    set_stock_on_engines,
+    EngineStock,
+    Entry,
+    NotEnoughStock,
+    StockReserved,
+)
 
 
 def test_returns_sum_of_quantities_per_product(tmp_path_factory) -> None:
@@ -52,3 +67,370 @@ def test_returns_sum_of_quantities_per_product(tmp_path_factory) -> None:
         Entry(product_id=product_1.id, quantity=3),
         Entry(product_id=product_2.id, quantity=0),
     }
+
+
+def test_returns_quantities_only_for_requested_products(tmp_path_factory) -> None:
+    sqlite_file = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{sqlite_file}")
+    Base.metadata.create_all(engine)
+    Session.remove()
+    Session.configure(bind=engine)
+
+    session = Session()
+    product_1 = Product(
+        name="Pants",
+        description="Irrelevant",
+        price=Money(1, Currency.PLN),
+        image=b"image",
+    )
+    product_2 = Product(
+        name="Shirt",
+        description="Irrelevant",
+        price=Money(1, Currency.PLN),
+        image=b"image",
+    )
+    session.add_all([product_1, product_2])
+    session.flush()
+    session.add_all(
+        [
+            Stock(product_id=product_1.id, quantity=1),
+            Stock(product_id=product_2.id, quantity=5),
+            Stock(product_id=product_2.id, quantity=2),
+        ]
+    )
+    session.flush()
+
+    inventory = get_inventory(product_ids=[product_2.id])
+
+    assert inventory == [Entry(product_id=product_2.id, quantity=7)]
+
+
+def test_dispense_plan_spreads_units_across_engines(tmp_path_factory) -> None:
+    sqlite_file = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{sqlite_file}")
+    Base.metadata.create_all(engine)
+    Session.remove()
+    Session.configure(bind=engine)
+
+    session = Session()
+    product_1 = Product(
+        name="Pants",
+        description="Irrelevant",
+        price=Money(1, Currency.PLN),
+        image=b"image",
+    )
+    product_2 = Product(
+        name="Shirt",
+        description="Irrelevant",
+        price=Money(1, Currency.PLN),
+        image=b"image",
+    )
+    session.add_all([product_1, product_2])
+    session.flush()
+    stock_1 = Stock(product_id=product_1.id, quantity=1)
+    stock_2 = Stock(product_id=product_1.id, quantity=3)
+    stock_3 = Stock(product_id=product_2.id, quantity=1)
+    session.add_all([stock_1, stock_2, stock_3])
+    session.flush()
+    session.add_all(
+        [
+            Engine(row=1, column=1, stock_id=stock_1.id),
+            Engine(row=1, column=2, stock_id=stock_2.id),
+            Engine(row=2, column=1, stock_id=stock_3.id),
+        ]
+    )
+    session.flush()
+
+    plan = plan_dispense({product_1.id: 3, product_2.id: 1})
+
+    assert plan == [(1, 1), (1, 2), (1, 2), (2, 1)]
+
+
+def test_dispense_plan_fails_when_stock_is_insufficient(tmp_path_factory) -> None:
+    sqlite_file = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{sqlite_file}")
+    Base.metadata.create_all(engine)
+    Session.remove()
+    Session.configure(bind=engine)
+
+    session = Session()
+    product = Product(
+        name="Pants",
+        description="Irrelevant",
+        price=Money(1, Currency.PLN),
+        image=b"image",
+    )
+    session.add(product)
+    session.flush()
+    stock = Stock(product_id=product.id, quantity=1)
+    session.add(stock)
+    session.flush()
+    session.add(Engine(row=1, column=1, stock_id=stock.id))
+    session.flush()
+
+    with pytest.raises(NotEnoughStock):
+        plan_dispense({product.id: 2})
+
+
+def test_reserved_stock_is_not_available(tmp_path_factory) -> None:
+    sqlite_file = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{sqlite_file}")
+    Base.metadata.create_all(engine)
+    Session.remove()
+    Session.configure(bind=engine)
+
+    session = Session()
+    product = Product(
+        name="Pants",
+        description="Irrelevant",
+        price=Money(1, Currency.PLN),
+        image=b"image",
+    )
+    session.add(product)
+    session.flush()
+    stock = Stock(product_id=product.id, quantity=2)
+    session.add(stock)
+    session.flush()
+    session.add(Engine(row=1, column=1, stock_id=stock.id))
+    session.flush()
+
+    reserve_stock(order_id=1, items={product.id: 2})
+
+    assert get_inventory() == [Entry(product_id=product.id, quantity=0)]
+    with pytest.raises(NotEnoughStock):
+        reserve_stock(order_id=2, items={product.id: 1})
+
+
+def test_released_reservation_makes_stock_available_again(
+    tmp_path_factory,
+) -> None:
+    sqlite_file = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{sqlite_file}")
+    Base.metadata.create_all(engine)
+    Session.remove()
+    Session.configure(bind=engine)
+
+    session = Session()
+    product = Product(
+        name="Pants",
+        description="Irrelevant",
+        price=Money(1, Currency.PLN),
+        image=b"image",
+    )
+    session.add(product)
+    session.flush()
+    stock = Stock(product_id=product.id, quantity=3)
+    session.add(stock)
+    session.flush()
+    session.add(Engine(row=1, column=1, stock_id=stock.id))
+    session.flush()
+    reserve_stock(order_id=1, items={product.id: 2})
+
+    lower_stock_on_engine(row=1, column=1, order_id=1)
+    release_reservation(order_id=1)
+
+    assert get_inventory() == [Entry(product_id=product.id, quantity=2)]
+
+
+def test_committed_stock_changes_are_published(tmp_path_factory) -> None:
+    sqlite_file = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{sqlite_file}")
+    Base.metadata.create_all(engine)
+    Session.remove()
+    Session.configure(bind=engine)
+
+    session = Session()
+    product = Product(
+        name="Pants",
+        description="Irrelevant",
+        price=Money(1, Currency.PLN),
+        image=b"image",
+    )
+    session.add(product)
+    session.commit()
+    product_id = product.id
+    version = inventory_feed.version
+
+    set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=3)
+    session.rollback()
+    set_stock_on_engine(row=1, column=1, product_id=product_id, quantity=3)
+    lower_stock_on_engine(row=1, column=1)
+    session.commit()
+
+    [change] = inventory_feed.changes_since(version)
+    assert dict(change.quantities) == {product_id: 2}
+
+
+def test_lowers_stock_by_many_units_at_once(tmp_path_factory) -> None:
+    sqlite_file = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{sqlite_file}")
+    Base.metadata.create_all(engine)
+    Session.remove()
+    Session.configure(bind=engine)
+
+    session = Session()
+    product = Product(
+        name="Pants",
+        description="Irrelevant",
+        price=Money(1, Currency.PLN),
+        image=b"image",
+    )
+    session.add(product)
+    session.flush()
+    set_stock_on_engine(row=1, column=1, product_id=product.id, quantity=3)
+
+    remaining = lower_stock_on_engine(row=1, column=1, quantity=2)
+
+    assert remaining == 1
+    assert get_inventory() == [Entry(product_id=product.id, quantity=1)]
+
+
+def test_lowering_more_than_stocked_fails(tmp_path_factory) -> None:
+    sqlite_file = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{sqlite_file}")
+    Base.metadata.create_all(engine)
+    Session.remove()
+    Session.configure(bind=engine)
+
+    session = Session()
+    product = Product(
+        name="Pants",
+        description="Irrelevant",
+        price=Money(1, Currency.PLN),
+        image=b"image",
+    )
+    session.add(product)
+    session.flush()
+    set_stock_on_engine(row=1, column=1, product_id=product.id, quantity=1)
+
+    with pytest.raises(NotEnoughStock):
+        lower_stock_on_engine(row=1, column=1, quantity=2)
+    with pytest.raises(NotEnoughStock):
+        lower_stock_on_engine(row=9, column=9)
+
+    assert get_inventory() == [Entry(product_id=product.id, quantity=1)]
+
+
+def test_restocks_whole_machine_in_few_statements(tmp_path_factory) -> None:
+    sqlite_file = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{sqlite_file}")
+    Base.metadata.create_all(engine)
+    Session.remove()
+    Session.configure(bind=engine)
+
+    session = Session()
+    product = Product(
+        name="Pants",
+        description="Irrelevant",
+        price=Money(1, Currency.PLN),
+        image=b"image",
+    )
+    session.add(product)
+    session.flush()
+    set_stock_on_engine(row=1, column=1, product_id=product.id, quantity=1)
+    entries = [
+        EngineStock(row=row, column=column, product_id=product.id, quantity=2)
+        for row in range(1, 7)
+        for column in range(1, 7)
+    ]
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(1))
+
+    set_stock_on_engines(entries)
+
+    assert len(statements) <= 4
+    assert get_inventory() == [Entry(product_id=product.id, quantity=72)]
+    assert session.scalar(select(func.count()).select_from(Stock)) == 36
+
+
+def test_finds_first_engine_with_product_in_stock(tmp_path_factory) -> None:
+    sqlite_file = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{sqlite_file}")
+    Base.metadata.create_all(engine)
+    Session.remove()
+    Session.configure(bind=engine)
+
+    session = Session()
+    product = Product(
+        name="Pants",
+        description="Irrelevant",
+        price=Money(1, Currency.PLN),
+        image=b"image",
+    )
+    session.add(product)
+    session.flush()
+    set_stock_on_engines(
+        [
+            EngineStock(row=1, column=1, product_id=product.id, quantity=0),
+            EngineStock(row=2, column=3, product_id=product.id, quantity=1),
+            EngineStock(row=2, column=2, product_id=product.id, quantity=1),
+        ]
+    )
+
+    assert get_engine_with_product(product.id) == (2, 2)
+    assert get_engine_with_product(product.id + 1) is None
+
+
+def test_switching_product_on_engine_publishes_both_products(
+    tmp_path_factory,
+) -> None:
+    sqlite_file = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{sqlite_file}")
+    Base.metadata.create_all(engine)
+    Session.remove()
+    Session.configure(bind=engine)
+
+    session = Session()
+    water = Product(
+        name="Water",
+        description="Irrelevant",
+        price=Money(1, Currency.PLN),
+        image=b"water",
+    )
+    peanuts = Product(
+        name="Peanuts",
+        description="Irrelevant",
+        price=Money(1, Currency.PLN),
+        image=b"peanuts",
+    )
+    session.add_all([water, peanuts])
+    session.flush()
+    set_stock_on_engine(row=1, column=1, product_id=water.id, quantity=4)
+    session.commit()
+    version = inventory_feed.version
+
+    set_stock_on_engine(row=1, column=1, product_id=peanuts.id, quantity=6)
+    session.commit()
+
+    [change] = inventory_feed.changes_since(version)
+    assert dict(change.quantities) == {water.id: 0, peanuts.id: 6}
+    assert get_inventory() == [Entry(product_id=peanuts.id, quantity=6)]
+
+
+def test_refuses_switching_product_with_reserved_units(tmp_path_factory) -> None:
+    sqlite_file = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{sqlite_file}")
+    Base.metadata.create_all(engine)
+    Session.remove()
+    Session.configure(bind=engine)
+
+    session = Session()
+    water = Product(
+        name="Water",
+        description="Irrelevant",
+        price=Money(1, Currency.PLN),
+        image=b"water",
+    )
+    peanuts = Product(
+        name="Peanuts",
+        description="Irrelevant",
+        price=Money(1, Currency.PLN),
+        image=b"peanuts",
+    )
+    session.add_all([water, peanuts])
+    session.flush()
+    set_stock_on_engine(row=1, column=1, product_id=water.id, quantity=4)
+    reserve_stock(1, {water.id: 1})
+
+    with pytest.raises(StockReserved):
+        set_stock_on_engine(row=1, column=1, product_id=peanuts.id, quantity=6)
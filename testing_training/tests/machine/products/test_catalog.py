@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import create_engine
+
+from testing_training.machine.database import Base, Session
+from testing_training.machine.products.catalog import catalog
+from testing_training.machine.products.money import Currency, Money
+from testing_training.machine.products.services import add_product
+
+
+@pytest.fixture(autouse=True)
+def db(tmp_path_factory) -> None:
+    sqlite_file = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{sqlite_file}")
+    Base.metadata.create_all(engine)
+    Session.remove()
+    Session.configure(bind=engine)
+    catalog.invalidate()
+
+
+def test_catalog_is_read_from_db_only_once() -> None:
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    misses_before = catalog.misses
+
+    catalog.products()
+    product = catalog.by_name()["Socks"]
+
+    assert catalog.misses == misses_before + 1
+    assert catalog.by_id()[product.id] == product
+    assert product.price == Money(9, Currency.PLN)
+
+
+def test_adding_product_invalidates_catalog() -> None:
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    version = catalog.version
+    assert [product.name for product in catalog.products()] == ["Socks"]
+
+    add_product(
+        name="Dress",
+        description="Nice dress",
+        price=Money(10, Currency.PLN),
+        image=b"image",
+    )
+
+    assert catalog.version > version
+    assert [product.name for product in catalog.products()] == ["Socks", "Dress"]
+
+
+def test_rolled_back_product_is_removed_from_catalog() -> None:
+    add_product(
+        name="Socks",
+        description="A pair of socks",
+        price=Money(9, Currency.PLN),
+        image=b"image",
+    )
+    assert "Socks" in catalog.by_name()
+
+    Session().rollback()
+
+    assert "Socks" not in catalog.by_name()
@@ -0,0 +1,89 @@
+from decimal import Decimal
+
+import pytest
+
+from testing_training.machine.products import money
+from testing_training.machine.products.money import Currency, Money, MoneyArray
+
+
+def test_keeps_amount_in_minor_units() -> None:
+    money = Money(3.59, Currency.PLN)
+
+    assert money.minor_units == 359
+    assert money.amount == Decimal("3.59")
+
+
+def test_trusted_constructor_equals_validated_one() -> None:
+    assert Money.from_minor_units(1050, Currency.USD) == Money("10.5", "USD")
+
+
+@pytest.mark.parametrize("amount", [-1, Decimal("-0.01"), Decimal("1.001")])
+def test_rejects_invalid_amounts(amount: Decimal | int) -> None:
+    with pytest.raises(ValueError):
+        Money(amount, Currency.PLN)
+
+
+def test_sums_order_lines() -> None:
+    lines = [Money("3.59", Currency.PLN) * 2, Money(5, Currency.PLN) * 1]
+
+    total = sum(lines)
+
+    assert total == Money("12.18", Currency.PLN)
+
+
+def test_does_not_add_different_currencies() -> None:
+    with pytest.raises(ValueError):
+        Money(1, Currency.PLN) + Money(1, Currency.USD)
+
+
+@pytest.fixture(params=["numpy", "array"])
+def money_backend(request, monkeypatch) -> None:
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(money, "numpy", None)
+
+
+def test_sum_of_products_matches_adding_money() -> None:
+    prices = [Money("3.59", Currency.PLN), Money(5, Currency.PLN), Money("0.01", "PLN")]
+    quantities = [2, 1, 7]
+
+    total = Money.sum_products(prices, quantities)
+
+    assert total == sum(price * quantity for price, quantity in zip(prices, quantities))
+
+
+def test_sum_of_products_in_different_currencies_fails() -> None:
+    with pytest.raises(ValueError):
+        Money.sum_products([Money(1, Currency.PLN), Money(1, Currency.USD)], [1, 1])
+
+
+@pytest.mark.usefixtures("money_backend")
+def test_mixed_currencies_are_subtotalled_but_not_totalled() -> None:
+    lines = MoneyArray.from_money(
+        [Money(1, Currency.PLN), Money(2, Currency.USD), Money(3, Currency.PLN)],
+        [1, 2, 3],
+    )
+
+    assert lines.subtotals() == {
+        Currency.PLN: Money(10, Currency.PLN),
+        Currency.USD: Money(4, Currency.USD),
+    }
+    with pytest.raises(ValueError):
+        lines.total()
+
+
+@pytest.mark.usefixtures("money_backend")
+def test_commission_split_loses_no_money() -> None:
+    lines = MoneyArray.from_money(
+        [Money("0.05", Currency.USD), Money("0.15", Currency.USD), Money(99, "USD")]
+    )
+
+    payouts, commissions = lines.split_commission(Decimal("0.1"))
+
+    assert list(commissions) == [
+        Money(0, Currency.USD),
+        Money("0.02", Currency.USD),
+        Money("9.9", Currency.USD),
+    ]
+    assert payouts.total() + commissions.total() == lines.total()
@@ -0,0 +1,31 @@
+import hashlib
+
+from sqlalchemy import create_engine, text
+
+from testing_training.machine.products.product import backfill_image_hashes
+
+
+def test_backfills_hashes_of_images_stored_before_hashing(tmp_path) -> None:
+    engine = create_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE products (id INTEGER PRIMARY KEY, name VARCHAR, "
+                "description VARCHAR, _amount NUMERIC, _currency VARCHAR, "
+                "image BLOB, image_hash VARCHAR)"
+            )
+        )
+        connection.execute(
+            text(
+                "INSERT INTO products VALUES "
+                "(1, 'Socks', 'Socks', 9, 'PLN', x'01', NULL), "
+                "(2, 'Dress', 'Dress', 10, 'PLN', x'02', 'kept')"
+            )
+        )
+
+        backfill_image_hashes(connection)
+
+        hashes = connection.execute(
+            text("SELECT image_hash FROM products ORDER BY id")
+        ).scalars()
+        assert list(hashes) == [hashlib.sha256(b"\x01").hexdigest(), "kept"]
@@ -0,0 +1,81 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+
+from testing_training.machine.database import Base, Session
+from testing_training.machine.inventory import Entry, get_inventory, reserve_stock
+from testing_training.machine.products.money import Currency, Money
+from testing_training.machine.products.product import Product
+from testing_training.machine.resupplier_app.app import app
+
+
+def _add_products(tmp_path_factory, *names: str) -> list[int]:
+    sqlite_file = tmp_path_factory.mktemp("db") / "test.db"
+    engine = create_engine(f"sqlite:///{sqlite_file}")
+    Base.metadata.create_all(engine)
+    Session.remove()
+    Session.configure(bind=engine)
+    session = Session()
+    products = [
+        Product(
+            name=name,
+            description="Irrelevant",
+            price=Money(1, Currency.PLN),
+            image=name.encode(),
+        )
+        for name in names
+    ]
+    session.add_all(products)
+    session.commit()
+    return [product.id for product in products]
+
+
+def test_restocks_engines(tmp_path_factory) -> None:
+    [product_id] = _add_products(tmp_path_factory, "Pants")
+
+    with TestClient(app) as client:
+        response = client.put(
+            "/stock",
+            json=[
+                {"row": 1, "column": 1, "product_id": product_id, "quantity": 3},
+                {"row": 1, "column": 2, "product_id": product_id, "quantity": 2},
+            ],
+        )
+
+    assert response.status_code == 200
+    assert get_inventory() == [Entry(product_id=product_id, quantity=5)]
+
+
+def test_loads_another_product_into_an_occupied_engine(tmp_path_factory) -> None:
+    water_id, peanuts_id = _add_products(tmp_path_factory, "Water", "Peanuts")
+
+    with TestClient(app) as client:
+        client.put(
+            "/stock",
+            json=[{"row": 1, "column": 1, "product_id": water_id, "quantity": 4}],
+        )
+        response = client.put(
+            "/stock",
+            json=[{"row": 1, "column": 1, "product_id": peanuts_id, "quantity": 6}],
+        )
+
+    assert response.status_code == 200
+    assert get_inventory() == [Entry(product_id=peanuts_id, quantity=6)]
+
+
+def test_refuses_restock_below_reserved_quantity(tmp_path_factory) -> None:
+    [product_id] = _add_products(tmp_path_factory, "Pants")
+
+    with TestClient(app) as client:
+        client.put(
+            "/stock",
+            json=[{"row": 1, "column": 1, "product_id": product_id, "quantity": 3}],
+        )
+        reserve_stock(1, {product_id: 2})
+        Session().commit()
+        response = client.put(
+            "/stock",
+            json=[{"row": 1, "column": 1, "product_id": product_id, "quantity": 1}],
+        )
+
+    assert response.status_code == 409
+    assert get_inventory() == [Entry(product_id=product_id, quantity=1)]
@@ -0,0 +1,33 @@
+import asyncio
+import threading
+
+from testing_training.machine.bus import Bus
+
+
+def test_delivers_messages_published_from_other_threads() -> None:
+    bus: Bus[int] = Bus()
+
+    async def receive_two() -> list[int]:
+        with bus.subscribe() as subscription:
+            publisher = threading.Thread(
+                target=lambda: [bus.publish(1), bus.publish(2)]
+            )
+            publisher.start()
+            received = [await subscription.get(), await subscription.get()]
+            publisher.join()
+            return received
+
+    assert asyncio.run(receive_two()) == [1, 2]
+
+
+def test_closed_subscription_receives_nothing() -> None:
+    bus: Bus[int] = Bus()
+
+    async def subscribe_and_close() -> bool:
+        subscription = bus.subscribe()
+        subscription.close()
+        bus.publish(1)
+        await asyncio.sleep(0)
+        return subscription._queue.empty()
+
+    assert asyncio.run(subscribe_and_close())
@@ -0,0 +1,164 @@
+import hashlib
+
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.pool import StaticPool
+
+from testing_training.machine.config import MachineSettings
+from testing_training.machine.buyer_app import app  # noqa: F401
+from testing_training.machine.buyer_app.order_archive import ArchivedOrder
+from testing_training.machine.database import (
+    MigrationError,
+    create_machine_engine,
+    migrate,
+)
+from testing_training.machine.inventory.engine import Engine  # noqa: F401
+from testing_training.machine.inventory.reservation import Reservation  # noqa: F401
+from testing_training.machine.products import Product
+
+
+def test_sqlite_file_engine_uses_configured_pragmas(tmp_path) -> None:
+    settings = MachineSettings(
+        DB_ENGINE_URL=f"sqlite:///{tmp_path / 'machine.db'}",
+        SQLITE_BUSY_TIMEOUT_MS=1234,
+    )
+    engine = create_machine_engine(settings)
+
+    with engine.connect() as connection:
+        journal_mode = connection.execute(text("PRAGMA journal_mode")).scalar()
+        synchronous = connection.execute(text("PRAGMA synchronous")).scalar()
+        busy_timeout = connection.execute(text("PRAGMA busy_timeout")).scalar()
+    engine.dispose()
+
+    assert journal_mode == "wal"
+    assert synchronous == 1
+    assert busy_timeout == 1234
+
+
+def test_in_memory_engine_shares_one_connection() -> None:
+    engine = create_machine_engine(MachineSettings(DB_ENGINE_URL="sqlite://"))
+
+    assert isinstance(engine.pool, StaticPool)
+
+
+def test_migrate_adds_missing_columns_and_indexes(tmp_path) -> None:
+    engine = create_machine_engine(
+        MachineSettings(DB_ENGINE_URL=f"sqlite:///{tmp_path / 'machine.db'}")
+    )
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "CREATE TABLE stocks (id INTEGER PRIMARY KEY, "
+                "product_id INTEGER NOT NULL, quantity INTEGER NOT NULL)"
+            )
+        )
+        connection.execute(text("INSERT INTO stocks VALUES (1, 1, 3)"))
+
+    migrate(engine)
+
+    inspector = inspect(engine)
+    assert "reservations" in inspector.get_table_names()
+    assert {index["name"] for index in inspector.get_indexes("stocks")} == {
+        "ix_stocks_product_id_quantity"
+    }
+    assert {index["name"] for index in inspector.get_indexes("engines")} == {
+        "ix_engines_stock_id"
+    }
+    with engine.connect() as connection:
+        reserved = connection.execute(text("SELECT reserved FROM stocks")).scalar()
+    engine.dispose()
+    assert reserved == 0
+
+
+BASELINE_SCHEMA = [
+    "CREATE TABLE products (id INTEGER NOT NULL, name VARCHAR NOT NULL, "
+    "description VARCHAR NOT NULL, _amount NUMERIC NOT NULL, "
+    "_currency VARCHAR NOT NULL, image BLOB NOT NULL, PRIMARY KEY (id), "
+    "UNIQUE (name))",
+    "CREATE TABLE orders (id INTEGER NOT NULL, created_at DATETIME NOT NULL, "
+    "status VARCHAR(16) NOT NULL, _amount NUMERIC NOT NULL, "
+    "_currency VARCHAR NOT NULL, items JSON NOT NULL, PRIMARY KEY (id))",
+    "CREATE TABLE stocks (id INTEGER NOT NULL, product_id INTEGER NOT NULL, "
+    "quantity INTEGER NOT NULL, PRIMARY KEY (id), "
+    "FOREIGN KEY(product_id) REFERENCES products (id))",
+    'CREATE TABLE engines ("row" INTEGER NOT NULL, "column" INTEGER NOT NULL, '
+    'stock_id INTEGER, PRIMARY KEY ("row", "column"), '
+    "FOREIGN KEY(stock_id) REFERENCES stocks (id))",
+    "INSERT INTO products VALUES (1, 'Socks', 'Socks', 9, 'PLN', x'01')",
+    "INSERT INTO orders VALUES (1, '2024-01-01 12:00:00.000000', 'DONE', 9, "
+    "'PLN', '{\"1\": 1}')",
+    "INSERT INTO stocks VALUES (1, 1, 3)",
+    "INSERT INTO engines VALUES (1, 1, 1)",
+]
+
+
+def _baseline_engine(tmp_path):
+    engine = create_machine_engine(
+        MachineSettings(DB_ENGINE_URL=f"sqlite:///{tmp_path / 'machine.db'}")
+    )
+    with engine.begin() as connection:
+        for statement in BASELINE_SCHEMA:
+            connection.execute(text(statement))
+    return engine
+
+
+def test_migrates_populated_baseline_database(tmp_path) -> None:
+    engine = _baseline_engine(tmp_path)
+
+    migrate(engine)
+
+    with engine.connect() as connection:
+        image_hash = connection.execute(
+            text("SELECT image_hash FROM products")
+        ).scalar()
+        order = connection.execute(
+            text("SELECT status, idempotency_key FROM orders")
+        ).one()
+    engine.dispose()
+    assert image_hash == hashlib.sha256(b"\x01").hexdigest()
+    assert tuple(order) == ("DONE", None)
+
+
+def test_migrate_stops_reusing_archived_order_ids(tmp_path) -> None:
+    engine = _baseline_engine(tmp_path)
+    with engine.begin() as connection:
+        ArchivedOrder.__table__.create(connection)
+        connection.execute(
+            text(
+                "INSERT INTO orders_archive (id, created_at, status, _amount, "
+                "_currency, items) VALUES (5, '2024-01-01 12:00:00.000000', "
+                "'DONE', 9, 'PLN', '{}')"
+            )
+        )
+
+    migrate(engine)
+
+    with engine.begin() as connection:
+        orders_sql = connection.execute(
+            text("SELECT sql FROM sqlite_master WHERE name = 'orders'")
+        ).scalar()
+        order_ids = connection.execute(text("SELECT id FROM orders")).scalars().all()
+        connection.execute(
+            text(
+                "INSERT INTO orders (created_at, status, _amount, _currency, items) "
+                "VALUES ('2024-02-01 12:00:00.000000', 'DONE', 9, 'PLN', '{}')"
+            )
+        )
+        new_order_id = connection.execute(text("SELECT max(id) FROM orders")).scalar()
+    indexes = {index["name"] for index in inspect(engine).get_indexes("orders")}
+    engine.dispose()
+    assert "AUTOINCREMENT" in orders_sql
+    assert order_ids == [1]
+    assert new_order_id == 6
+    assert indexes == {"ix_orders_idempotency_key", "ix_orders_status_created_at"}
+
+
+def test_refuses_not_null_column_without_default_or_backfill(
+    tmp_path, monkeypatch
+) -> None:
+    engine = _baseline_engine(tmp_path)
+    monkeypatch.delitem(Product.__table__.c.image_hash.info, "backfill")
+
+    with pytest.raises(MigrationError):
+        migrate(engine)
+    engine.dispose()